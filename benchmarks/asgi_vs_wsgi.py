@@ -0,0 +1,57 @@
+"""Compara el modo WSGI (gunicorn sync, wsgi.py) con el modo ASGI (uvicorn worker,
+asgi.py) con la misma base de datos, el mismo numero de workers y la misma carga.
+
+    python benchmarks/asgi_vs_wsgi.py --database-url sqlite:////tmp/bench.db --seed 2000
+    python benchmarks/asgi_vs_wsgi.py --database-url postgresql://localhost/bench --concurrency 256
+
+Resultado en JSON por stdout (o en --output).
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(__file__))
+from loadgen import run_load, wait_until_up  # noqa: E402
+from server import MODES, bench_env, create_schema, seed, start_server  # noqa: E402
+
+DEFAULT_PATHS = ["/character?limit=20", "/planet/1", "/vehicle?limit=50&sort=name", "/user/1/favorite"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:////tmp/bench.db")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--seed", type=int, default=0, help="vacia la base y carga N filas por tabla antes de medir")
+    parser.add_argument("--path", action="append", dest="paths", help="ruta a medir (repetible)")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    env = bench_env(args.database_url, args.workers, CACHE_BACKEND="none")
+    create_schema(env)
+    if args.seed:
+        seed(env, {"users": args.seed, "characters": args.seed, "planets": args.seed, "vehicles": args.seed,
+                   "favorites_per_user": 5, "random_seed": 42})
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = {"config": vars(args), "modes": {}}
+    for mode in MODES:
+        server = start_server(mode, args.port, args.workers, env)
+        try:
+            wait_until_up(base_url, "/planet")
+            results["modes"][mode] = run_load(base_url, args.paths or DEFAULT_PATHS, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compara dos resultados de benchmarks/run.py y marca regresiones.
+
+    python benchmarks/compare.py benchmarks/results/abc123.json benchmarks/results/def456.json
+    python benchmarks/compare.py base.json new.json --threshold 10
+
+Sale con codigo 1 si alguna ruta empeora mas de --threshold % en throughput o p95,
+o si hace mas consultas SQL por request que antes.
+"""
+import sys
+import json
+import argparse
+
+# metrica -> True si mas alto es mejor
+METRICS = {"throughput_rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False, "queries_per_request": False, "rss_mb": False}
+GATED = ("throughput_rps", "p95_ms")
+
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(base, new, threshold):
+    rows, regressions = [], []
+    for route in sorted(set(base["routes"]) | set(new["routes"])):
+        old_stats, new_stats = base["routes"].get(route), new["routes"].get(route)
+        if old_stats is None or new_stats is None:
+            rows.append((route, "only in " + ("new" if old_stats is None else "base"), "", "", ""))
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, current = old_stats.get(metric), new_stats.get(metric)
+            delta = change(old, current)
+            if delta is None and old == current:
+                continue
+            worse = delta is not None and (-delta if higher_is_better else delta) > threshold
+            if metric == "queries_per_request" and old is not None and current is not None and current > old:
+                worse = True
+            elif metric not in GATED and metric != "queries_per_request":
+                worse = False
+            if worse:
+                regressions.append((route, metric))
+            rows.append((route, metric, old, current, f"{delta:+.1f}%" + (" REGRESSION" if worse else "") if delta is not None else ""))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=15, help="porcentaje de empeoramiento tolerado")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"base {base.get('commit')}  ->  new {new.get('commit')}")
+    rows, regressions = compare(base, new, args.threshold)
+    for route, metric, old, current, delta in rows:
+        print(f"{route:32} {metric:22} {str(old):>10} -> {str(current):>10} {delta}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold}%", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
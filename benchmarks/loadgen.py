@@ -0,0 +1,109 @@
+"""Generador de carga minimo (solo stdlib): N hilos con conexiones keep-alive
+lanzando requests durante un tiempo fijo."""
+import re
+import time
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+# la instrumentacion SQL de la app publica: Server-Timing: db;dur=1.23;desc="3 queries"
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies, errors, elapsed, queries=None, statuses=None):
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None
+    }
+    if queries:
+        summary["queries_per_request"] = round(sum(queries) / len(queries), 2)
+    if statuses:
+        summary["statuses"] = dict(sorted(statuses.items()))
+    return summary
+
+
+def as_request_factory(paths, method="GET"):
+    def make_request(i):
+        return method, paths[i % len(paths)], None
+    return make_request
+
+
+def run_load(base_url, requests, concurrency=16, duration=10.0, timeout=30):
+    """requests es una lista de rutas GET o una funcion i -> (method, path, body).
+    Los 5xx y los errores de conexion cuentan como errores; el resto entra en las latencias."""
+    make_request = as_request_factory(requests) if isinstance(requests, (list, tuple)) else requests
+    parts = urlsplit(base_url)
+    latencies, queries, statuses = [], [], {}
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(10 ** 12))
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        local, local_queries, local_statuses, failed = [], [], {}, 0
+        while time.perf_counter() < deadline:
+            with lock:
+                i = next(counter)
+            method, path, body = make_request(i)
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+                continue
+            elapsed = time.perf_counter() - start
+            local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+            if response.status >= 500:
+                failed += 1
+                continue
+            local.append(elapsed)
+            match = QUERIES_RE.search(response.getheader("Server-Timing") or "")
+            if match:
+                local_queries.append(int(match.group(1)))
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            queries.extend(local_queries)
+            errors[0] += failed
+            for status, n in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + n
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started, queries, statuses)
+
+
+def wait_until_up(base_url, path="/", timeout=30):
+    parts = urlsplit(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            connection.request("GET", path)
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not start in {timeout}s")
@@ -0,0 +1,207 @@
+"""Benchmark de todas las rutas de src/app.py.
+
+Carga un volumen configurable de datos, arranca la app con gunicorn y lanza cada
+ruta durante --duration segundos con --concurrency conexiones. Por ruta guarda
+throughput, latencias p50/p95/p99, consultas SQL por request (de la cabecera
+Server-Timing) y la RSS de gunicorn al terminar. El resultado va a
+benchmarks/results/<commit>.json para compararlo con compare.py.
+
+    python benchmarks/run.py                                   # SQLite en /tmp
+    python benchmarks/run.py --database-url postgresql://localhost/bench --users 10000 --catalog 100000
+    python benchmarks/run.py --only get_all_characters --only get_single_planet
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import subprocess
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+from loadgen import run_load, wait_until_up  # noqa: E402
+from server import ROOT, SRC, bench_env, create_schema, seed, start_server, process_tree_rss  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class Scenarios:
+    """Una funcion i -> (method, path, body) por endpoint de Flask.
+
+    Los borrados consumen ids de un rango reservado al final de cada tabla para no
+    vaciar los datos que usan las lecturas; las altas usan nombres unicos."""
+
+    def __init__(self, volumes, delete_pool):
+        self.v = volumes
+        self.delete_pool = delete_pool
+        self.unique = itertools.count()
+        self.lock = threading.Lock()
+        self.deletable = {
+            entity: iter(range(total - delete_pool + 1, total + 1))
+            for entity, total in (("user", volumes["users"]), ("character", volumes["characters"]),
+                                  ("planet", volumes["planets"]), ("vehicle", volumes["vehicles"]))
+        }
+
+    def live(self, total):
+        # ids que no se van a borrar durante el benchmark
+        return random.randint(1, max(1, total - self.delete_pool))
+
+    def next_unique(self):
+        with self.lock:
+            return next(self.unique)
+
+    def next_deletable(self, entity):
+        with self.lock:
+            return next(self.deletable[entity], 10 ** 9)
+
+    def get(self, path):
+        return lambda i: ("GET", path, None)
+
+    def get_detail(self, entity, total):
+        return lambda i: ("GET", f"/{entity}/{self.live(total)}", None)
+
+    def post(self, path, body):
+        return lambda i: ("POST", path, json.dumps(body(self.next_unique())).encode())
+
+    def delete(self, path, body):
+        return lambda i: ("DELETE", path, json.dumps(body()).encode())
+
+    def delete_detail(self, entity):
+        return lambda i: ("DELETE", f"/{entity}/{self.next_deletable(entity)}", None)
+
+    def delete_many(self, entity, count=5):
+        return lambda i: ("DELETE", f"/{entity}?ids={','.join(str(self.next_deletable(entity)) for _ in range(count))}", None)
+
+    def build(self):
+        v = self.v
+        character = lambda n: dict(name=f"Bench character {n}", birth_year="19BBY", height=1.72, skin_color="fair", eye_color="blue")
+        planet = lambda n: dict(name=f"Bench planet {n}", climate="arid", diameter=10465, population=200000, terrain="desert")
+        vehicle = lambda n: dict(name=f"Bench vehicle {n}", model="T-16", cargo_capacity=50, length=10.4, passengers=1)
+        batch = lambda: {
+            "planet_ids": [self.live(v["planets"]) for _ in range(5)],
+            "character_ids": [self.live(v["characters"]) for _ in range(5)],
+            "vehicle_ids": [self.live(v["vehicles"]) for _ in range(5)]
+        }
+        user_id = lambda: self.live(v["users"])
+        return {
+            "sitemap": self.get("/"),
+            "health": self.get("/health"),
+            "metrics": self.get("/metrics"),
+            "get_all_users": self.get("/user?limit=50"),
+            "get_all_characters": self.get("/character?limit=50"),
+            "get_all_planets": self.get("/planet?limit=50&sort=name"),
+            "get_all_vehicles": self.get("/vehicle?limit=50"),
+            "export_entity": self.get("/export/planet?format=ndjson"),
+            "top_entities": lambda i: ("GET", f"/top/{random.choice(['character', 'planet', 'vehicle'])}?limit=10", None),
+            "search_catalog": lambda i: ("GET", f"/search?q={random.choice(['planet', 'character+12', 'vehicle', 'desert', 'model+3'])}", None),
+            "get_single_user": self.get_detail("user", v["users"]),
+            "get_single_character": self.get_detail("character", v["characters"]),
+            "get_single_planet": self.get_detail("planet", v["planets"]),
+            "get_single_vehicle": self.get_detail("vehicle", v["vehicles"]),
+            "get_user_favorites": lambda i: ("GET", f"/user/{user_id()}/favorite?expand=1", None),
+            "create_user": self.post("/user", lambda n: {"email": f"bench{n}-{time.time_ns()}@bench.local", "password": "x"}),
+            "create_character": self.post("/character", lambda n: character(f"{n}-{time.time_ns()}")),
+            "create_planet": self.post("/planet", lambda n: planet(f"{n}-{time.time_ns()}")),
+            "create_vehicle": self.post("/vehicle", lambda n: vehicle(f"{n}-{time.time_ns()}")),
+            "bulk_create_characters": self.post("/character/bulk", lambda n: [character(f"{n}-{k}-{time.time_ns()}") for k in range(100)]),
+            "bulk_create_planets": self.post("/planet/bulk", lambda n: [planet(f"{n}-{k}-{time.time_ns()}") for k in range(100)]),
+            "bulk_create_vehicles": self.post("/vehicle/bulk", lambda n: [vehicle(f"{n}-{k}-{time.time_ns()}") for k in range(100)]),
+            "add_favorite_character": self.post("/favorite/character", lambda n: {"user_id": user_id(), "character_id": self.live(v["characters"])}),
+            "add_favorite_planet": self.post("/favorite/planet", lambda n: {"user_id": user_id(), "planet_id": self.live(v["planets"])}),
+            "add_favorites_batch": lambda i: ("POST", f"/user/{user_id()}/favorites/batch", json.dumps(batch()).encode()),
+            "delete_favorite_character": self.delete("/favorite/character", lambda: {"user_id": user_id(), "character_id": self.live(v["characters"])}),
+            "delete_favorite_planet": self.delete("/favorite/planet", lambda: {"user_id": user_id(), "planet_id": self.live(v["planets"])}),
+            "delete_favorites_batch": lambda i: ("DELETE", f"/user/{user_id()}/favorites/batch", json.dumps(batch()).encode()),
+            "delete_character": self.delete_detail("character"),
+            "delete_planet": self.delete_detail("planet"),
+            "delete_vehicle": self.delete_detail("vehicle"),
+            "delete_user": self.delete_detail("user"),
+            "bulk_delete_characters": self.delete_many("character"),
+            "bulk_delete_planets": self.delete_many("planet"),
+            "bulk_delete_vehicles": self.delete_many("vehicle"),
+            "bulk_delete_users": self.delete_many("user"),
+        }
+
+
+def app_endpoints(env):
+    """Endpoints reales de la app (sin admin ni static) para detectar rutas sin escenario."""
+    script = (
+        "import json\nfrom app import create_app\n"
+        "print(json.dumps(sorted({r.endpoint.removeprefix('api.') for r in create_app().url_map.iter_rules()"
+        " if r.endpoint != 'static' and r.endpoint.removeprefix('api.').isidentifier()})))"
+    )
+    output = subprocess.run([sys.executable, "-c", script], cwd=SRC, env=env, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:////tmp/bench.db")
+    parser.add_argument("--mode", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--catalog", type=int, default=10000, help="filas de characters, planets y vehicles")
+    parser.add_argument("--favorites-per-user", type=int, default=5)
+    parser.add_argument("--delete-pool", type=int, default=500, help="filas reservadas por tabla para los DELETE")
+    parser.add_argument("--only", action="append", help="endpoint a medir (repetible)")
+    parser.add_argument("--cache", default="none", help="CACHE_BACKEND de la app durante el benchmark")
+    parser.add_argument("--output", help="por defecto benchmarks/results/<commit>.json")
+    parser.add_argument("--random-seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.random_seed)
+    volumes = {
+        "users": args.users, "characters": args.catalog, "planets": args.catalog, "vehicles": args.catalog,
+        "favorites_per_user": args.favorites_per_user, "random_seed": args.random_seed
+    }
+    env = bench_env(args.database_url, args.workers, CACHE_BACKEND=args.cache)
+    create_schema(env)
+    print(f"Seeding {volumes}...", file=sys.stderr)
+    seed(env, volumes)
+
+    scenarios = Scenarios(volumes, args.delete_pool).build()
+    endpoints = app_endpoints(env)
+    selected = [e for e in scenarios if e in endpoints and (not args.only or e in args.only)]
+    results = {
+        "commit": git_commit(),
+        "timestamp": int(time.time()),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "only")},
+        "not_benchmarked": [e for e in endpoints if e not in scenarios],
+        "routes": {}
+    }
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(args.mode, args.port, args.workers, env)
+    try:
+        wait_until_up(base_url, "/health")
+        for endpoint in selected:
+            print(f"  {endpoint}...", file=sys.stderr)
+            summary = run_load(base_url, scenarios[endpoint], args.concurrency, args.duration)
+            summary["rss_mb"] = process_tree_rss(server.pid)
+            results["routes"][endpoint] = summary
+    finally:
+        server.terminate()
+        server.wait()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(json.dumps(results["routes"], indent=2, sort_keys=True))
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
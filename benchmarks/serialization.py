@@ -0,0 +1,85 @@
+"""Microbenchmark de la serializacion de listas: serialize() + encoder estandar frente
+a projection() + rows_to_dicts() + orjson, con N filas de Characters y Vehicles
+(ambos con columnas Numeric, que llegan como Decimal).
+
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --rows 50000 --repeat 10
+
+Mide consulta + construccion de dicts + codificacion en proceso, sin HTTP.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn())
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 2), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "serialization.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("SQL_INSTRUMENTATION", "0")
+    sys.path.insert(0, SRC)
+    from flask.json.provider import DefaultJSONProvider
+    from sqlalchemy import insert, select
+    from app import create_app, db
+    from models import Characters, Vehicles
+    from serialization import SERIALIZED_FIELDS, OrjsonProvider, orjson, projection, rows_to_dicts
+
+    app = create_app()
+    stdlib = DefaultJSONProvider(app)
+    fast = OrjsonProvider(app) if orjson is not None else None
+    results = {"rows": args.rows}
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Characters), [
+            dict(name=f"Character {i}", birth_year=f"{i % 900}BBY", height=1 + (i % 100) / 100, skin_color="fair", eye_color="blue")
+            for i in range(args.rows)
+        ])
+        db.session.execute(insert(Vehicles), [
+            dict(name=f"Vehicle {i}", model="T-16", cargo_capacity=i, length=i / 7, passengers=i % 30)
+            for i in range(args.rows)
+        ])
+        db.session.commit()
+
+        for model in (Characters, Vehicles):
+            def orm_dicts():
+                db.session.expunge_all()
+                return [item.serialize() for item in db.session.scalars(select(model).order_by(model.id))]
+
+            def projected_dicts():
+                return rows_to_dicts(db.session.execute(projection(model).order_by(model.id)), SERIALIZED_FIELDS[model])
+
+            cases = {
+                "orm_serialize_stdlib": lambda: stdlib.dumps({"results": orm_dicts()}),
+                "projection_stdlib": lambda: stdlib.dumps({"results": projected_dicts()}),
+            }
+            if fast is not None:
+                cases["orm_serialize_orjson"] = lambda: fast.dumps_bytes({"results": orm_dicts()})
+                cases["projection_orjson"] = lambda: fast.dumps_bytes({"results": projected_dicts()})
+            timings = {name: best_of(args.repeat, fn)[0] for name, fn in cases.items()}
+            baseline = timings["orm_serialize_stdlib"]
+            results[model.__tablename__] = {
+                name: {"ms": ms, "speedup": round(baseline / ms, 2)} for name, ms in timings.items()
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
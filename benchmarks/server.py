@@ -0,0 +1,103 @@
+"""Arranque de la app bajo gunicorn y carga de datos para los benchmarks."""
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+MODES = {
+    "wsgi": ["gunicorn", "wsgi:application"],
+    "asgi": ["gunicorn", "asgi:app", "-k", "uvicorn_worker.UvicornWorker"]
+}
+
+
+def bench_env(database_url, workers, **extra):
+    env = dict(os.environ, DATABASE_URL=database_url, WEB_CONCURRENCY=str(workers))
+    env.update({key: str(value) for key, value in extra.items()})
+    return env
+
+
+def create_schema(env):
+    subprocess.run(
+        [sys.executable, "-c", "from app import create_app, db\nwith create_app().app_context(): db.create_all()"],
+        cwd=SRC, env=env, check=True
+    )
+
+
+def start_server(mode, port, workers, env):
+    command = MODES[mode] + ["--chdir", "./src/", "-w", str(workers), "-b", f"127.0.0.1:{port}", "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=ROOT, env=env)
+
+
+def process_tree_rss(pid):
+    """RSS total en MB del proceso y sus hijos (master + workers de gunicorn), leido de /proc."""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        return None
+    total_kb = 0
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return round(total_kb / 1024, 1)
+
+
+SEED_SCRIPT = r'''
+import sys, json, random
+from sqlalchemy import insert, delete
+from app import create_app, db
+from models import User, Characters, Planets, Vehicles, Favorites
+from favorites import reconcile_counts
+
+volumes = json.loads(sys.argv[1])
+random.seed(volumes["random_seed"])
+CHUNK = 5000
+
+def load(model, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[start:start + CHUNK])
+
+with create_app().app_context():
+    for model in (Favorites, User, Characters, Planets, Vehicles):
+        db.session.execute(delete(model))
+    load(User, [dict(id=i, email=f"user{i}@bench.local", password="x", is_active=True) for i in range(1, volumes["users"] + 1)])
+    load(Characters, [dict(id=i, name=f"Character {i}", birth_year=f"{i % 900}BBY", height=round(1 + (i % 100) / 100, 2),
+                           skin_color=random.choice(["fair", "gold", "white", "green"]), eye_color=random.choice(["blue", "brown", "red", "yellow"]))
+                      for i in range(1, volumes["characters"] + 1)])
+    load(Planets, [dict(id=i, name=f"Planet {i}", climate=random.choice(["arid", "temperate", "frozen", "murky"]), diameter=random.randint(1000, 200000),
+                        population=random.randint(0, 10 ** 9), terrain=random.choice(["desert", "grasslands", "tundra", "swamp"]))
+                   for i in range(1, volumes["planets"] + 1)])
+    load(Vehicles, [dict(id=i, name=f"Vehicle {i}", model=f"Model {i % 50}", cargo_capacity=random.randint(0, 10 ** 6),
+                         length=round(random.uniform(1, 500), 2), passengers=random.randint(0, 500))
+                    for i in range(1, volumes["vehicles"] + 1)])
+    favorites = []
+    per_user = volumes["favorites_per_user"]
+    targets = (("planet_id", volumes["planets"]), ("character_id", volumes["characters"]), ("vehicle_id", volumes["vehicles"]))
+    for user_id in range(1, volumes["users"] + 1):
+        for column, total in targets:
+            for target in random.sample(range(1, total + 1), min(per_user, total)):
+                row = {"user_id": user_id, "planet_id": None, "character_id": None, "vehicle_id": None}
+                row[column] = target
+                favorites.append(row)
+    load(Favorites, favorites)
+    reconcile_counts(db.session)
+    if db.engine.dialect.name == "postgresql":
+        # los ids se insertan a mano: hay que mover las secuencias para que los POST no choquen
+        for table in ("user", "characters", "planets", "vehicles", "favorites"):
+            db.session.execute(db.text(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), COALESCE(MAX(id), 1)) FROM \"{table}\""))
+    db.session.commit()
+'''
+
+
+def seed(env, volumes):
+    """Vacia las tablas y carga volumes = {users, characters, planets, vehicles, favorites_per_user, random_seed}."""
+    subprocess.run([sys.executable, "-c", SEED_SCRIPT, json.dumps(volumes)], cwd=SRC, env=env, check=True)
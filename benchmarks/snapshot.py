@@ -0,0 +1,107 @@
+"""Snapshot columnar frente a JSON (/export) para Characters, Vehicles y Favorites.
+
+    python benchmarks/snapshot.py
+    python benchmarks/snapshot.py --rows 200000 --repeat 3
+
+Por tabla y formato mide el tamaño (tal cual y con gzip), el tiempo de escribirlo desde
+la base de datos y dos lecturas: `load` decodifica todas las filas a valores de Python
+(json.loads frente a to_pylist() por lote) y `scan` suma la columna id, que en los
+formatos columnares se lee sobre el mmap sin decodificar el resto. Todo en proceso,
+contra un SQLite temporal.
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 2), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'snapshot.db')}"
+    os.environ.setdefault("SQL_INSTRUMENTATION", "0")
+    os.environ.setdefault("COMPRESS", "0")
+    sys.path.insert(0, SRC)
+    from sqlalchemy import insert
+    from app import create_app, db
+    from models import User, Characters, Vehicles, Favorites
+    import snapshot
+
+    app = create_app()
+    client = app.test_client()
+    results = {"rows": args.rows, "formats": list(snapshot.FORMATS)}
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [dict(email=f"user{i}@example.com", password="x") for i in range(args.rows)])
+        db.session.execute(insert(Characters), [
+            dict(name=f"Character {i}", birth_year=f"{i % 900}BBY", height=1 + (i % 100) / 100, skin_color="fair", eye_color="blue")
+            for i in range(args.rows)
+        ])
+        db.session.execute(insert(Vehicles), [
+            dict(name=f"Vehicle {i}", model="T-16", cargo_capacity=i, length=i / 7, passengers=i % 30)
+            for i in range(args.rows)
+        ])
+        db.session.execute(insert(Favorites), [
+            dict(user_id=i + 1, character_id=(i * 7) % args.rows + 1, planet_id=None, vehicle_id=None) for i in range(args.rows)
+        ])
+        db.session.commit()
+
+        for entity, model in (("character", Characters), ("vehicle", Vehicles), ("favorites", Favorites)):
+            cases = {}
+            if entity in ("character", "vehicle"):
+                # lo que devuelve hoy el API: /export en JSON
+                ms, body = best_of(args.repeat, lambda: client.get(f"/export/{entity}").get_data())
+                load_ms, _ = best_of(args.repeat, lambda: json.loads(body)["results"])
+                scan_ms, _ = best_of(args.repeat, lambda: sum(row["id"] for row in json.loads(body)["results"]))
+                cases["json_export"] = {
+                    "bytes": len(body), "gzip_bytes": len(gzip.compress(body, 6)),
+                    "write_ms": ms, "load_ms": load_ms, "scan_ms": scan_ms
+                }
+            for fmt in snapshot.FORMATS:
+                path = snapshot.snapshot_path(workdir, model, fmt)
+
+                def write():
+                    with open(path, "wb") as f:
+                        for rows in snapshot.write_table(db.session, model, f, fmt):
+                            pass
+                    return rows
+
+                def load():
+                    with snapshot.open_snapshot(path) as reader:
+                        return sum(1 for row in snapshot.snapshot_rows(reader))
+
+                def scan():
+                    with snapshot.open_snapshot(path) as reader:
+                        return sum(sum(batch["id"].to_pylist()) for batch in reader.batches())
+
+                write_ms, _ = best_of(args.repeat, write)
+                with open(path, "rb") as f:
+                    data = f.read()
+                cases[fmt] = {
+                    "bytes": len(data), "gzip_bytes": len(gzip.compress(data, 6)),
+                    "write_ms": write_ms, "load_ms": best_of(args.repeat, load)[0], "scan_ms": best_of(args.repeat, scan)[0]
+                }
+            results[entity] = cases
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Tiempo de arranque de un proceso: importar la app y crearla, como hace cada worker.
+
+Cada caso se lanza --repeat veces en un interprete nuevo con `python -X importtime` y se
+queda la ejecucion mas rapida. Por caso guarda el tiempo total del proceso, el de
+importar + create_app() medido dentro, y los paquetes que mas tardan en importarse.
+El resultado va a benchmarks/results/startup-<commit>.json.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 10 --top 20
+
+Casos:
+    worker        gunicorn sin admin (lo que importa wsgi.py)
+    worker_admin  igual con ENABLE_ADMIN=1
+    cli           la app como la crea el comando flask (con Flask-Migrate)
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(__file__))
+from run import RESULTS_DIR, git_commit  # noqa: E402
+from server import SRC  # noqa: E402
+
+# create_app() se mide desde dentro: sin contar el arranque del interprete
+TIMED = "import time; start = time.perf_counter(); {}; print(round((time.perf_counter() - start) * 1000, 2))"
+
+CASES = {
+    "worker": (TIMED.format("import wsgi"), {"ENABLE_ADMIN": "0"}),
+    "worker_admin": (TIMED.format("import wsgi"), {"ENABLE_ADMIN": "1"}),
+    # dentro de un contexto de click, como cuando la crea `flask db ...`
+    "cli": (TIMED.format("import click, app\nwith click.Context(click.Command('db')): app.create_app()"), {"ENABLE_ADMIN": "0"})
+}
+
+
+def parse_importtime(stderr):
+    """Lineas "import time: self | cumulative | modulo" -> [(modulo, profundidad, cumulative_us)].
+    La sangria del nombre (dos espacios por nivel) indica la profundidad."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), depth, int(cumulative)))
+    return modules
+
+
+def run_case(code, extra_env, database_url):
+    env = dict(os.environ, DATABASE_URL=database_url, **extra_env)
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC, env=env, check=True, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    app_ms = float(output.stdout.strip().splitlines()[-1])
+    return wall_ms, app_ms, parse_importtime(output.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:////tmp/startup.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="modulos mas lentos a guardar por caso")
+    parser.add_argument("--output", help="por defecto benchmarks/results/startup-<commit>.json")
+    args = parser.parse_args()
+
+    results = {"commit": git_commit(), "timestamp": int(time.time()), "repeat": args.repeat, "cases": {}}
+    for name, (code, extra_env) in CASES.items():
+        runs = [run_case(code, extra_env, args.database_url) for _ in range(args.repeat)]
+        wall_ms, app_ms, modules = min(runs, key=lambda run: run[0])
+        # paquetes donde se importaron por primera vez, con todo lo que arrastran
+        packages = sorted(((module, cumulative) for module, depth, cumulative in modules if "." not in module),
+                          key=lambda package: -package[1])
+        results["cases"][name] = {
+            "process_ms": round(wall_ms, 2),
+            "import_and_create_ms": app_ms,
+            "import_ms": round(sum(cumulative for module, depth, cumulative in modules if depth == 0) / 1000, 2),
+            "slowest_imports_ms": [[module, round(cumulative / 1000, 2)] for module, cumulative in packages[:args.top]]
+        }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(json.dumps(results["cases"], indent=2, sort_keys=True))
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
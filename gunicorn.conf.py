@@ -0,0 +1,27 @@
+# gunicorn lee este fichero automaticamente al arrancar desde la raiz del repo
+# (Procfile / render.yaml: gunicorn wsgi --chdir ./src/)
+import gc
+import os
+
+# src/db_config.py usa los mismos valores para dimensionar el pool de conexiones
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+
+# el master importa la app una sola vez y los workers la heredan con fork (copy-on-write):
+# arrancan sin volver a importar nada y comparten esa memoria. GUNICORN_PRELOAD=0 lo
+# desactiva (p.ej. para --reload en desarrollo)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+    # lo creado al importar pasa a la generacion permanente del GC: las recolecciones de los
+    # workers no lo recorren ni escriben en esas paginas, que siguen compartidas con el master
+    if preload_app:
+        gc.freeze()
+
+
+def child_exit(server, worker):
+    # con metricas multiproceso hay que descartar los ficheros del worker que muere
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -80,6 +80,13 @@ def run_migrations_online():
     connectable = current_app.extensions['migrate'].db.get_engine()
 
     with connectable.connect() as connection:
+        sqlite = connection.dialect.name == "sqlite"
+        if sqlite:
+            # batch_alter_table recrea las tablas (DROP + RENAME); con foreign_keys=ON el DROP de
+            # una tabla referenciada borraria en cascada sus favoritos
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            # cierra la transaccion que abre exec_driver_sql para que alembic abra y confirme la suya
+            connection.commit()
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
@@ -90,6 +97,9 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+        if sqlite:
+            connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+
 
 if context.is_offline_mode():
     run_migrations_offline()
@@ -0,0 +1,57 @@
+"""busqueda de texto: indices GIN (postgres) o tabla FTS5 con triggers (sqlite)
+
+Revision ID: 9d4c61b8e2a3
+Revises: 2ae47a5c1ed4
+Create Date: 2026-10-18 07:40:12.381054
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4c61b8e2a3'
+down_revision = '2ae47a5c1ed4'
+branch_labels = None
+depends_on = None
+
+# copia de src/search.py (postgres_ddl / sqlite_ddl) en el momento de esta migracion
+POSTGRES = [
+    "CREATE INDEX IF NOT EXISTS ix_characters_search ON characters USING gin ((setweight(to_tsvector('simple', coalesce(name, '')), 'A') || setweight(to_tsvector('simple', coalesce(birth_year, '') || ' ' || coalesce(skin_color, '') || ' ' || coalesce(eye_color, '')), 'B')))",
+    "CREATE INDEX IF NOT EXISTS ix_planets_search ON planets USING gin ((setweight(to_tsvector('simple', coalesce(name, '')), 'A') || setweight(to_tsvector('simple', coalesce(climate, '') || ' ' || coalesce(terrain, '')), 'B')))",
+    "CREATE INDEX IF NOT EXISTS ix_vehicles_search ON vehicles USING gin ((setweight(to_tsvector('simple', coalesce(name, '')), 'A') || setweight(to_tsvector('simple', coalesce(model, '')), 'B')))",
+]
+
+SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(name, attributes, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS characters_search_insert AFTER INSERT ON characters BEGIN INSERT INTO search_index(rowid, name, attributes) VALUES (new.id * 4 + 1, new.name, coalesce(new.birth_year, '') || ' ' || coalesce(new.skin_color, '') || ' ' || coalesce(new.eye_color, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS characters_search_delete AFTER DELETE ON characters BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 1; END",
+    "CREATE TRIGGER IF NOT EXISTS characters_search_update AFTER UPDATE ON characters BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 1; INSERT INTO search_index(rowid, name, attributes) VALUES (new.id * 4 + 1, new.name, coalesce(new.birth_year, '') || ' ' || coalesce(new.skin_color, '') || ' ' || coalesce(new.eye_color, '')); END",
+    "INSERT INTO search_index(rowid, name, attributes) SELECT id * 4 + 1, name, coalesce(birth_year, '') || ' ' || coalesce(skin_color, '') || ' ' || coalesce(eye_color, '') FROM characters WHERE id * 4 + 1 NOT IN (SELECT rowid FROM search_index)",
+    "CREATE TRIGGER IF NOT EXISTS planets_search_insert AFTER INSERT ON planets BEGIN INSERT INTO search_index(rowid, name, attributes) VALUES (new.id * 4 + 2, new.name, coalesce(new.climate, '') || ' ' || coalesce(new.terrain, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS planets_search_delete AFTER DELETE ON planets BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 2; END",
+    "CREATE TRIGGER IF NOT EXISTS planets_search_update AFTER UPDATE ON planets BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 2; INSERT INTO search_index(rowid, name, attributes) VALUES (new.id * 4 + 2, new.name, coalesce(new.climate, '') || ' ' || coalesce(new.terrain, '')); END",
+    "INSERT INTO search_index(rowid, name, attributes) SELECT id * 4 + 2, name, coalesce(climate, '') || ' ' || coalesce(terrain, '') FROM planets WHERE id * 4 + 2 NOT IN (SELECT rowid FROM search_index)",
+    "CREATE TRIGGER IF NOT EXISTS vehicles_search_insert AFTER INSERT ON vehicles BEGIN INSERT INTO search_index(rowid, name, attributes) VALUES (new.id * 4 + 3, new.name, coalesce(new.model, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS vehicles_search_delete AFTER DELETE ON vehicles BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 3; END",
+    "CREATE TRIGGER IF NOT EXISTS vehicles_search_update AFTER UPDATE ON vehicles BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 3; INSERT INTO search_index(rowid, name, attributes) VALUES (new.id * 4 + 3, new.name, coalesce(new.model, '')); END",
+    "INSERT INTO search_index(rowid, name, attributes) SELECT id * 4 + 3, name, coalesce(model, '') FROM vehicles WHERE id * 4 + 3 NOT IN (SELECT rowid FROM search_index)",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {"postgresql": POSTGRES, "sqlite": SQLITE}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for table in ("characters", "planets", "vehicles"):
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search")
+    elif dialect == "sqlite":
+        for table in ("characters", "planets", "vehicles"):
+            for action in ("insert", "delete", "update"):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{action}")
+        op.execute("DROP TABLE IF EXISTS search_index")
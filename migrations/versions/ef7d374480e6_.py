@@ -0,0 +1,58 @@
+"""ON DELETE CASCADE en las claves foraneas de favorites
+
+Revision ID: ef7d374480e6
+Revises: 892cd51aa92e
+Create Date: 2026-10-18 07:29:20.346011
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ef7d374480e6'
+down_revision = '892cd51aa92e'
+branch_labels = None
+depends_on = None
+
+# columna de favorites -> tabla a la que apunta
+FOREIGN_KEYS = {
+    'user_id': 'user',
+    'planet_id': 'planets',
+    'character_id': 'characters',
+    'vehicle_id': 'vehicles'
+}
+# en SQLite las claves foraneas no tienen nombre: batch_alter_table les da este para poder borrarlas
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def replace_foreign_keys(ondelete):
+    # los nombres cambian segun la base de datos y como se crearon: se leen de la tabla
+    existing = {
+        fk['constrained_columns'][0]: fk['name']
+        for fk in sa.inspect(op.get_bind()).get_foreign_keys('favorites')
+    }
+    with op.batch_alter_table('favorites', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        for column, table in FOREIGN_KEYS.items():
+            if column in existing:
+                batch_op.drop_constraint(existing[column] or f'fk_favorites_{column}_{table}', type_='foreignkey')
+            batch_op.create_foreign_key(f'favorites_{column}_fkey', table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    favorites = sa.table('favorites', *[sa.column(column) for column in FOREIGN_KEYS])
+    # hasta ahora borrar una entidad dejaba sus favoritos con la columna a NULL (y SQLite no
+    # comprobaba las claves foraneas): se quitan antes de crear las restricciones
+    op.execute(favorites.delete().where(
+        favorites.c.planet_id.is_(None), favorites.c.character_id.is_(None), favorites.c.vehicle_id.is_(None)
+    ))
+    for column, table in FOREIGN_KEYS.items():
+        parent = sa.table(table, sa.column('id'))
+        op.execute(favorites.delete().where(
+            favorites.c[column].is_not(None), favorites.c[column].not_in(sa.select(parent.c.id))
+        ))
+    replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    replace_foreign_keys(None)
@@ -1,20 +1,281 @@
+"""Panel de administracion (/admin) pensado para tablas grandes.
+
+ModelView de Flask-Admin hace COUNT(*) y OFFSET en cada pagina del listado, y sus
+filtros y busqueda son ILIKE '%...%' que recorren la tabla entera. ScalableModelView:
+
+- muestra un conteo estimado (estadisticas de la base de datos) en vez de COUNT(*)
+- pagina por keyset: los enlaces anterior/siguiente llevan un cursor (after/before)
+  con la clave de la ultima/primera fila; un enlace directo a ?page=N usa OFFSET
+- solo ofrece filtros, orden y busqueda (por prefijo) sobre columnas con indice,
+  los mismos de filters.py
+- no carga los favoritos de cada fila: enlaza al listado de Favorites filtrado
+"""
 import os
+from flask import g, request, url_for
+from markupsafe import Markup
 from flask_admin import Admin
-from models import db, Characters, Planets, Vehicles, User
+from flask_admin.babel import lazy_gettext
 from flask_admin.contrib.sqla import ModelView
+from flask_admin.contrib.sqla.filters import (
+    BaseSQLAFilter, FilterEqual, FilterInList, FilterGreater, FilterSmaller,
+    IntEqualFilter, IntInListFilter, IntGreaterFilter, IntSmallerFilter
+)
+from sqlalchemy import Integer, select, func, or_, text
+from sqlalchemy.orm import joinedload
+from utils import APIException
+from pagination import encode_cursor, decode_cursor, cursor_values
+from filters import FILTERABLE, SORTABLE, sort_keys, order_clause, keyset_condition, prefix_condition
+from conditional import bump_version
+from favorites import count_update, user_count_updates, FAVORITE_TYPES
+from models import db, Characters, Planets, Vehicles, User, Favorites, ENTITIES
+
+CURSOR_ARGS = ("after", "before")
+ENTITY_NAMES = {model: name for name, model in ENTITIES.items()}
+
+# columna de busqueda (por prefijo, tiene indice unico) de cada modelo
+SEARCH_COLUMNS = {
+    User: ("email",),
+    Characters: ("name",),
+    Planets: ("name",),
+    Vehicles: ("name",)
+}
+
+# columna de Favorites que apunta a cada modelo
+FAVORITE_COLUMNS = {User: "user_id", **{model: column for model, column in FAVORITE_TYPES.values()}}
+
+
+class FilterPrefix(BaseSQLAFilter):
+    def apply(self, query, value, alias=None):
+        return query.filter(prefix_condition(self.get_column(alias), value))
+
+    def validate(self, value):
+        return bool(value)
+
+    def operation(self):
+        return lazy_gettext("starts with")
+
+
+# operador de filters.py -> (filtro de texto, filtro de enteros); ne y los rangos
+# inclusivos no se ofrecen: != no usa el indice y gte/lte no tienen filtro en Flask-Admin
+FILTER_TYPES = {
+    "eq": (FilterEqual, IntEqualFilter),
+    "in": (FilterInList, IntInListFilter),
+    "gt": (FilterGreater, IntGreaterFilter),
+    "lt": (FilterSmaller, IntSmallerFilter),
+    "prefix": (FilterPrefix, FilterPrefix)
+}
+
+
+def index_filters(model):
+    filters = []
+    for name, ops in FILTERABLE.get(model, {}).items():
+        column = getattr(model, name)
+        numeric = isinstance(column.type, Integer)
+        label = name.replace("_", " ").capitalize()
+        filters += [FILTER_TYPES[op][numeric](column, label) for op in ops if op in FILTER_TYPES]
+    return filters
+
+
+def estimated_count(session, model):
+    """Filas aproximadas segun las estadisticas de la base de datos, sin recorrer la tabla.
+    Si no hay estadisticas (tabla nunca analizada) se usa max(id), que sale del indice."""
+    table = model.__tablename__
+    dialect = session.get_bind().dialect.name
+    estimate = None
+    if dialect == "postgresql":
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"), {"table": f'"{table}"'}
+        ).scalar()
+    elif dialect == "mysql":
+        estimate = session.execute(
+            text("SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = :table"),
+            {"table": table}
+        ).scalar()
+    elif dialect == "sqlite":
+        # sqlite_stat1 solo existe despues de ANALYZE; el primer numero de stat es el total de filas
+        has_stats = session.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")).scalar()
+        if has_stats:
+            stat = session.execute(text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table LIMIT 1"), {"table": table}).scalar()
+            estimate = int(stat.split()[0]) if stat else None
+    if not estimate or estimate < 0:
+        estimate = session.scalar(select(func.max(model.id)))
+    return int(estimate or 0)
+
+
+def favorites_link(view, context, model, name):
+    """Enlace al listado de Favorites de esta fila: no se cargan hasta que se abre."""
+    label = getattr(model, "favorites_count", None)
+    url = view.favorites.list_url(FAVORITE_COLUMNS[view.model], model.id)
+    return Markup('<a href="{}">{}</a>').format(url, "view" if label is None else label)
+
+
+def related(attribute):
+    # Favorites muestra un atributo de la fila relacionada (los __repr__ de los modelos no sirven)
+    def formatter(view, context, model, name):
+        item = getattr(model, name)
+        return "" if item is None else getattr(item, attribute)
+    return formatter
+
+
+class ScalableModelView(ModelView):
+    list_template = "admin/model/scalable_list.html"
+    simple_list_pager = True
+    can_set_page_size = False
+    can_view_details = True
+    named_filter_urls = True
+    page_size = 50
+    form_excluded_columns = ("favorites", "favorites_count")
+    column_formatters = {"favorites": favorites_link, "favorites_count": favorites_link}
+
+    def __init__(self, model, session, favorites=None, **kwargs):
+        # se configuran antes de que Flask-Admin prepare los filtros y el orden
+        self.favorites = favorites
+        if self.column_sortable_list is None:
+            self.column_sortable_list = SORTABLE.get(model, ("id",))
+        if self.column_filters is None:
+            self.column_filters = index_filters(model)
+        if self.column_searchable_list is None:
+            self.column_searchable_list = SEARCH_COLUMNS.get(model, ())
+        if self.column_details_list is None and favorites is not None:
+            self.column_details_list = [column.key for column in model.__table__.columns] + ["favorites"]
+        super().__init__(model, session, **kwargs)
+
+    def list_url(self, column, value):
+        """URL del listado filtrado por column == value (necesita un IntEqualFilter sobre column)."""
+        for index, flt in enumerate(self._filters):
+            if isinstance(flt, IntEqualFilter) and flt.column.key == column:
+                return url_for(f"{self.endpoint}.index_view", **self._get_filters([(index, flt.name, value)]))
+        raise ValueError(f"{self.model.__name__} has no equality filter on {column}")
+
+    def _apply_search(self, query, count_query, joins, count_joins, search):
+        search = search.strip()
+        if search:
+            query = query.filter(or_(*[prefix_condition(field, search) for field, path in self._search_fields]))
+        return query, count_query, joins, count_joins
+
+    def list_sort(self, sort_column, sort_desc):
+        # mismo formato que ?sort= del API; una columna sin indice ordena por id
+        if sort_column not in self._sortable_columns:
+            sort_column = "id"
+        return ("-" if sort_desc else "") + sort_column
+
+    def page_cursor(self, sort, page, keys):
+        """(direccion, valores) del cursor de la URL si corresponde a esta pagina y orden."""
+        for direction in CURSOR_ARGS:
+            token = request.args.get(direction)
+            if not token:
+                continue
+            try:
+                cursor_sort, values = decode_cursor(token)
+            except APIException:
+                return None, None
+            if cursor_sort == sort and isinstance(values, list) and values[:1] == [page] and len(values) == len(keys) + 1:
+                return direction, values[1:]
+        return None, None
+
+    def get_list(self, page, sort_column, sort_desc, search, filters, execute=True, page_size=None):
+        page_size = self.page_size if page_size is None else page_size
+        query = self.get_query()
+        joins = {}
+        if self._search_supported and search:
+            query, _, joins, _ = self._apply_search(query, None, joins, {}, search)
+        if filters and self._filters:
+            query, _, joins, _ = self._apply_filters(query, None, joins, {}, filters)
+        if not search and not filters:
+            self._template_args["estimated_count"] = estimated_count(self.session, self.model)
+        for relation in self._auto_joins:
+            query = query.options(joinedload(getattr(self.model, relation)))
+
+        sort = self.list_sort(sort_column, sort_desc)
+        keys = sort_keys(sort)
+        direction, values = self.page_cursor(sort, page, keys)
+        if direction == "before":
+            # la pagina anterior es la siguiente en el orden inverso
+            keys = [(column, not descending) for column, descending in keys]
+        if values is not None:
+            query = query.filter(keyset_condition(self.model, keys, values))
+        query = query.order_by(*[order_clause(self.model, column, descending) for column, descending in keys])
+        if page_size:
+            query = query.limit(page_size)
+            if page and values is None:
+                query = query.offset(page * page_size)
+        if not execute:
+            return None, query
+
+        items = query.all()
+        if direction == "before":
+            items.reverse()
+        cursors = {}
+        if items and page_size:
+            cursors[page + 1] = ("after", encode_cursor(sort, [page + 1] + cursor_values(items[-1], sort)))
+            if page > 1:
+                cursors[page - 1] = ("before", encode_cursor(sort, [page - 1] + cursor_values(items[0], sort)))
+        g.admin_cursors = (self.endpoint, sort, cursors)
+        # None: plantilla con paginador simple (anterior/siguiente), sin COUNT(*)
+        return None, items
+
+    def _get_list_url(self, view_args):
+        view_args = view_args.clone()
+        for arg in CURSOR_ARGS:
+            view_args.extra_args.pop(arg, None)
+        endpoint, sort, cursors = g.get("admin_cursors", (None, None, {}))
+        column = self._get_column_by_idx(view_args.sort)
+        page_sort = self.list_sort(column[0] if column else None, view_args.sort_desc)
+        if endpoint == self.endpoint and page_sort == sort and view_args.page in cursors:
+            direction, token = cursors[view_args.page]
+            view_args.extra_args[direction] = token
+        return super()._get_list_url(view_args)
+
+    # las escrituras desde el panel invalidan la cache y los ETag igual que las del API
+    def on_model_change(self, form, model, is_created):
+        bump_version(self.session, ENTITY_NAMES.get(self.model, "favorites"))
+
+    def on_model_delete(self, model):
+        if self.model is User:
+            for stmt in user_count_updates([model.id]):
+                self.session.execute(stmt)
+        bump_version(self.session, "favorites")
+        if self.model in ENTITY_NAMES:
+            bump_version(self.session, ENTITY_NAMES[self.model])
+
+
+class FavoritesView(ScalableModelView):
+    can_create = False
+    can_edit = False
+    column_list = ("id", "user", "character", "planet", "vehicle")
+    column_details_list = column_list
+    # una sola consulta con los JOIN (joinedload), no una por fila y relacion
+    column_select_related_list = ("user", "character", "planet", "vehicle")
+    column_formatters = {
+        "user": related("email"),
+        "character": related("name"),
+        "planet": related("name"),
+        "vehicle": related("name")
+    }
+    column_searchable_list = ()
+    # todas las columnas tienen indice (user_id es la primera de los indices unicos)
+    column_filters = [
+        IntEqualFilter(Favorites.user_id, "User"),
+        IntEqualFilter(Favorites.character_id, "Character"),
+        IntEqualFilter(Favorites.planet_id, "Planet"),
+        IntEqualFilter(Favorites.vehicle_id, "Vehicle")
+    ]
+
+    def on_model_delete(self, model):
+        for entity, column in FAVORITE_TYPES.values():
+            if getattr(model, column) is not None:
+                self.session.execute(count_update(entity, [getattr(model, column)], -1))
+        bump_version(self.session, "favorites")
+
 
 def setup_admin(app):
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     app.config['FLASK_ADMIN_SWATCH'] = 'cerulean'
     admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3')
 
-    
-    # Add your models here, for example this is how we add a the User model to the admin
-    admin.add_view(ModelView(User, db.session))
-    admin.add_view(ModelView(Characters, db.session))
-    admin.add_view(ModelView(Planets, db.session))
-    admin.add_view(ModelView(Vehicles, db.session))
-
-
-    # You can duplicate that line to add mew models
-    # admin.add_view(ModelView(YourModelName, db.session))
\ No newline at end of file
+    favorites = FavoritesView(Favorites, db.session)
+    admin.add_view(ScalableModelView(User, db.session, favorites=favorites))
+    admin.add_view(ScalableModelView(Characters, db.session, favorites=favorites))
+    admin.add_view(ScalableModelView(Planets, db.session, favorites=favorites))
+    admin.add_view(ScalableModelView(Vehicles, db.session, favorites=favorites))
+    admin.add_view(favorites)
@@ -1,204 +1,367 @@
 import os
-from flask import Flask, request, jsonify, url_for
+import time
+import click
+from flask import Flask, Blueprint, request, jsonify, current_app
 from sqlalchemy import select
-from flask_migrate import Migrate
-from flask_swagger import swagger
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from flask_cors import CORS
 from utils import APIException, generate_sitemap
-from admin import setup_admin
-from models import db, Characters, Planets, Vehicles, User, Favorites
-
-app = Flask(__name__)
-app.url_map.strict_slashes = False
-
-db_url = os.getenv("DATABASE_URL")
-if db_url is not None:
-    app.config['SQLALCHEMY_DATABASE_URI'] = db_url.replace("postgres://", "postgresql://")
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:////tmp/test.db"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-MIGRATE = Migrate(app, db)
-db.init_app(app)
-CORS(app)
-setup_admin(app)
+from pagination import paginate, page_headers
+from filters import filter_conditions
+import search
+from streaming import stream_export
+import serialization
+from serialization import get_fields, projection, page_projection, rows_to_dicts
+from cache import cache
+import compression
+from conditional import conditional, bump_version
+from bulk import read_items, bulk_create, read_ids, bulk_delete
+from seed import seed_files, load_tables, SEED_CHUNK_SIZE
+import snapshot
+from snapshot import SNAPSHOT_TABLES, FORMATS, DEFAULT_FORMAT
+import instrumentation
+from instrumentation import query_budget
+import metrics
+import db_config
+from replicas import router
+from favorites import (read_batch, add_favorites, remove_favorites, user_favorites, count_update,
+                       user_count_updates, reconcile_counts, top_favorites, get_top_limit,
+                       is_unique_violation, ADD_ATTEMPTS)
+from models import db, Characters, Planets, Vehicles, User, Favorites, ENTITIES
+
+# rutas del API; create_app() las registra en la app (cli_group=None: los comandos
+# quedan como `flask reconcile-favorites`, no bajo `flask api`)
+api = Blueprint("api", __name__, cli_group=None)
+
+# presupuestos de consultas de las rutas calientes (query_budget): no dependen del numero de
+# filas, asi un N+1 se ve en el log y con SQL_BUDGET_STRICT (tests/) es un error
+READ_BUDGET = 2          # version de la tabla (conditional) + la consulta
+FAVORITE_BUDGET = 6      # usuario, entidad, insert, contador y version
+FAVORITES_BATCH_BUDGET = 12  # usuario + por tipo (consulta, insert, contador) + version
 
 # Handle/serialize errors like a JSON object
-@app.errorhandler(APIException)
+@api.app_errorhandler(APIException)
 def handle_invalid_usage(error):
     return jsonify(error.to_dict()), error.status_code
 
+#endpoint de salud: comprueba la base de datos y muestra la configuracion del engine
+@api.route('/health', methods=['GET'])
+def health():
+    response_body = {"database": db_config.engine_summary(db.engine)}
+    try:
+        db_config.ping(db.session)
+    except Exception as e:
+        response_body.update(status="error", error=str(e))
+        return jsonify(response_body), 503
+    response_body["status"] = "ok"
+    return jsonify(response_body), 200
+
 # generate sitemap with all your endpoints
-@app.route('/')
+@api.route('/')
 def sitemap():
-    return generate_sitemap(app)
+    return generate_sitemap(current_app)
 
 #endpoint para obtener todos los usuarios
-@app.route('/user', methods=['GET'])
+@api.route('/user', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('user')
 def get_all_users():
-    data = db.session.scalars(select(User)).all()
-    if not data:  
+    fields = get_fields(User)
+    data, next_cursor = paginate(db.session, User, page_projection(User, fields))
+    if not data and "cursor" not in request.args:
         return jsonify({"error": "No users found"}), 404
-    results = list(map(lambda item: item.serialize(), data))
+    results = rows_to_dicts(data, fields)
     response_body = {
-        "results":results
+        "results":results,
+        "next_cursor": next_cursor
     }
-    return jsonify(response_body), 200
+    return jsonify(response_body), 200, page_headers(next_cursor)
 
 #endpoint para obtener todos los personajes
-@app.route('/character', methods=['GET'])
+@api.route('/character', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('character')
+@cache.cached('character')
 def get_all_characters():
-    data = db.session.scalars(select(Characters)).all()
-    if not data:  
+    fields = get_fields(Characters)
+    data, next_cursor = paginate(db.session, Characters, page_projection(Characters, fields))
+    if not data and "cursor" not in request.args:
         return jsonify({"error": "No characters found"}), 404
-    results = list(map(lambda item: item.serialize(), data))
+    results = rows_to_dicts(data, fields)
     response_body = {
-        "results":results
+        "results":results,
+        "next_cursor": next_cursor
     }
-    return jsonify(response_body), 200
+    return jsonify(response_body), 200, page_headers(next_cursor)
 
 #endpoint para obtener todos los planetas
-@app.route('/planet', methods=['GET'])
+@api.route('/planet', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('planet')
+@cache.cached('planet')
 def get_all_planets():
-    data = db.session.scalars(select(Planets)).all()
-    if not data:  
+    fields = get_fields(Planets)
+    data, next_cursor = paginate(db.session, Planets, page_projection(Planets, fields))
+    if not data and "cursor" not in request.args:
         return jsonify({"error": "No planets found"}), 404
-    results = list(map(lambda item: item.serialize(), data))
+    results = rows_to_dicts(data, fields)
     response_body = {
-        "results":results
+        "results":results,
+        "next_cursor": next_cursor
     }
-    return jsonify(response_body), 200
+    return jsonify(response_body), 200, page_headers(next_cursor)
 
 #endpoint para obtener todos los vehiculos
-@app.route('/vehicle', methods=['GET'])
+@api.route('/vehicle', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('vehicle')
+@cache.cached('vehicle')
 def get_all_vehicles():
-    data = db.session.scalars(select(Vehicles)).all()
-    if not data:  
+    fields = get_fields(Vehicles)
+    data, next_cursor = paginate(db.session, Vehicles, page_projection(Vehicles, fields))
+    if not data and "cursor" not in request.args:
         return jsonify({"error": "No vehicles found"}), 404
-    results = list(map(lambda item: item.serialize(), data))
+    results = rows_to_dicts(data, fields)
     response_body = {
-        "results":results
+        "results":results,
+        "next_cursor": next_cursor
     }
-    return jsonify(response_body), 200
+    return jsonify(response_body), 200, page_headers(next_cursor)
+
+#endpoint para exportar una coleccion completa en streaming (json o ndjson)
+@api.route('/export/<entity>', methods=['GET'])
+def export_entity(entity):
+    model = ENTITIES.get(entity)
+    if model is None:
+        return jsonify({"error": f"Unknown entity {entity}"}), 404
+    fmt = request.args.get("format", "json")
+    if fmt not in ("json", "ndjson"):
+        return jsonify({"error": "format must be json or ndjson"}), 400
+    return stream_export(db.session, model, fmt, get_fields(model), filter_conditions(model, request.args))
+
+#endpoint para descargar una tabla completa como snapshot columnar (ver src/snapshot.py)
+@api.route('/snapshot/<entity>', methods=['GET'])
+def download_snapshot(entity):
+    if not os.getenv("SNAPSHOT_TOKEN"):
+        return jsonify({"error": "Snapshots are not enabled"}), 404
+    if not snapshot.authorized():
+        return jsonify({"error": "Invalid or missing token"}), 401, {"WWW-Authenticate": "Bearer"}
+    model = SNAPSHOT_TABLES.get(entity)
+    if model is None:
+        return jsonify({"error": f"Unknown entity {entity}"}), 404
+    fmt = request.args.get("format", DEFAULT_FORMAT)
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(FORMATS)}"}), 400
+    return snapshot.stream_snapshot(db.session, model, fmt)
+
+#endpoint de busqueda de texto en personajes, planetas y vehiculos
+@api.route('/search', methods=['GET'])
+def search_catalog():
+    results, next_cursor = search.search(db.session, request.args)
+    response_body = {
+        "results": results,
+        "next_cursor": next_cursor
+    }
+    return jsonify(response_body), 200, page_headers(next_cursor)
 
 #endpoint para obtener un solo usuario
-@app.route('/user/<int:id>', methods=['GET'])
+@api.route('/user/<int:id>', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('user')
 def get_single_user(id):
+    fields = get_fields(User)
     try:
-        user = db.session.execute(select(User).filter_by(id=id)).scalar_one()
+        user = db.session.execute(projection(User, fields).where(User.id == id)).one()
         response_body = {
-            "result": user.serialize()
+            "result": dict(zip(fields, user))
         }
         return jsonify(response_body), 200
     except:
         return jsonify({"msg": "user does not exist"}), 404
 
 #endpoint para obtener un solo personaje
-@app.route('/character/<int:id>', methods=['GET'])
+@api.route('/character/<int:id>', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('character')
+@cache.cached('character')
 def get_single_character(id):
+    fields = get_fields(Characters)
     try:
-        user = db.session.execute(select(Characters).filter_by(id=id)).scalar_one()
+        user = db.session.execute(projection(Characters, fields).where(Characters.id == id)).one()
         response_body = {
-            "result": user.serialize()
+            "result": dict(zip(fields, user))
         }
         return jsonify(response_body), 200
     except:
         return jsonify({"msg": "character does not exist"}), 404
 
 #endpoint para obtener un solo planeta
-@app.route('/planet/<int:id>', methods=['GET'])
+@api.route('/planet/<int:id>', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('planet')
+@cache.cached('planet')
 def get_single_planet(id):
+    fields = get_fields(Planets)
     try:
-        user = db.session.execute(select(Planets).filter_by(id=id)).scalar_one()
+        user = db.session.execute(projection(Planets, fields).where(Planets.id == id)).one()
         response_body = {
-            "result": user.serialize()
+            "result": dict(zip(fields, user))
         }
         return jsonify(response_body), 200
     except:
         return jsonify({"msg": "planet does not exist"}), 404
 
 #endpoint para obtener un solo vehiculo
-@app.route('/vehicle/<int:id>', methods=['GET'])
+@api.route('/vehicle/<int:id>', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('vehicle')
+@cache.cached('vehicle')
 def get_single_vehicle(id):
+    fields = get_fields(Vehicles)
     try:
-        user = db.session.execute(select(Vehicles).filter_by(id=id)).scalar_one()
+        user = db.session.execute(projection(Vehicles, fields).where(Vehicles.id == id)).one()
         response_body = {
-            "result": user.serialize()
+            "result": dict(zip(fields, user))
         }
         return jsonify(response_body), 200
     except:
         return jsonify({"msg": "vehicle does not exist"}), 404
 
 #endpoint para agregar un user
-@app.route('/user', methods=['POST'])
+@api.route('/user', methods=['POST'])
 def create_user():
     request_data = request.json
     if "email" not in request_data or "password" not in request_data:
         return jsonify({"error": "Email and password are required"}), 400   
-    existing_user = User.query.filter_by(email=request_data["email"]).first()
-    if existing_user:
-        return jsonify({"error": "Email is already registered"}), 400   
     user = User(email=request_data["email"], password=request_data["password"])
     db.session.add(user)
-    db.session.commit()
+    # el indice unico de email detecta el duplicado sin consultar antes
+    try:
+        bump_version(db.session, "user")
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Email is already registered"}), 400
     response_body = {
         "msg": f"user with ID {user.id} created"
     }
     return jsonify(response_body), 200
 
 #endpoint para agregar un character
-@app.route('/character', methods=['POST'])
+@api.route('/character', methods=['POST'])
 def create_character():
     request_data = request.json
-    existing_character = Characters.query.filter_by(name=request_data["name"]).first()
-    if existing_character:
-            return jsonify({"error": "Character with this name already exists"}), 400
     user = Characters(name=request_data["name"], birth_year=request_data["birth_year"], height=request_data["height"], skin_color=request_data["skin_color"], eye_color=request_data["eye_color"])
     db.session.add(user)
-    db.session.commit()
+    try:
+        bump_version(db.session, "character")
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Character with this name already exists"}), 400
+    cache.invalidate("character")
     response_body = {
         "msg": f"character with ID {user.id} created"
     }
     return jsonify(response_body), 200
 
 #endpoint para agregar un planeta
-@app.route('/planet', methods=['POST'])
+@api.route('/planet', methods=['POST'])
 def create_planet():
     request_data = request.json
-    existing_character = Planets.query.filter_by(name=request_data["name"]).first()
-    if existing_character:
-            return jsonify({"error": "Planet with this name already exists"}), 400
     user = Planets(name=request_data["name"], climate=request_data["climate"], diameter=request_data["diameter"], population=request_data["population"], terrain=request_data["terrain"])
     db.session.add(user)
-    db.session.commit()
+    try:
+        bump_version(db.session, "planet")
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Planet with this name already exists"}), 400
+    cache.invalidate("planet")
     response_body = {
         "msg": f"planet with ID {user.id} created"
     }
     return jsonify(response_body), 200
 
 #endpoint para agregar un vehiculo
-@app.route('/vehicle', methods=['POST'])
+@api.route('/vehicle', methods=['POST'])
 def create_vehicle():
     request_data = request.json
-    existing_vehicle = Vehicles.query.filter_by(name=request_data["name"]).first()
-    if existing_vehicle:
-            return jsonify({"error": "Vehicle with this name already exists"}), 400
     user = Vehicles(name=request_data["name"], model=request_data["model"], cargo_capacity=request_data["cargo_capacity"], length=request_data["length"], passengers=request_data["passengers"])
     db.session.add(user)
-    db.session.commit()
+    try:
+        bump_version(db.session, "vehicle")
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Vehicle with this name already exists"}), 400
+    cache.invalidate("vehicle")
     response_body = {
         "msg": f"vehicle with ID {user.id} created"
     }
     return jsonify(response_body), 200
 
+#endpoint para agregar personajes en bloque (array JSON o NDJSON)
+@api.route('/character/bulk', methods=['POST'])
+def bulk_create_characters():
+    items = read_items()
+    results, created = bulk_create(db.session, Characters, items)
+    if created:
+        bump_version(db.session, "character")
+    db.session.commit()
+    cache.invalidate("character")
+    response_body = {
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }
+    return jsonify(response_body), 200
+
+#endpoint para agregar planetas en bloque (array JSON o NDJSON)
+@api.route('/planet/bulk', methods=['POST'])
+def bulk_create_planets():
+    items = read_items()
+    results, created = bulk_create(db.session, Planets, items)
+    if created:
+        bump_version(db.session, "planet")
+    db.session.commit()
+    cache.invalidate("planet")
+    response_body = {
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }
+    return jsonify(response_body), 200
+
+#endpoint para agregar vehiculos en bloque (array JSON o NDJSON)
+@api.route('/vehicle/bulk', methods=['POST'])
+def bulk_create_vehicles():
+    items = read_items()
+    results, created = bulk_create(db.session, Vehicles, items)
+    if created:
+        bump_version(db.session, "vehicle")
+    db.session.commit()
+    cache.invalidate("vehicle")
+    response_body = {
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }
+    return jsonify(response_body), 200
+
 #endpoint para borrar un usuario
-@app.route('/user/<int:id>', methods=['DELETE'])
+@api.route('/user/<int:id>', methods=['DELETE'])
 def delete_user(id):
     try:
         user = db.session.execute(db.select(User).filter_by(id=id)).scalar_one_or_none()
         if not user:
             return jsonify({"error": "User not found"}), 404
+        for stmt in user_count_updates([id]):
+            db.session.execute(stmt)
+        # sus favoritos los borra la base de datos (ON DELETE CASCADE), sin cargarlos
         db.session.delete(user)
+        bump_version(db.session, "user")
+        bump_version(db.session, "favorites")
         db.session.commit()
         response_body = {
             "msg": f"User {user.email} with ID {user.id} was deleted, along with their favorites."
@@ -209,61 +372,147 @@ def delete_user(id):
         return jsonify({"error": str(e)}), 500
 
 #endpoint para borrar un personaje
-@app.route('/character/<int:id>', methods=['DELETE'])
+@api.route('/character/<int:id>', methods=['DELETE'])
 def delete_character(id):
     user = db.session.execute(db.select(Characters).filter_by(id=id)).scalar_one_or_none()
     if not user:
         return jsonify({"error": "Character not found"}), 404
+    # sus favoritos los borra la base de datos (ON DELETE CASCADE), sin cargarlos
     db.session.delete(user)
+    bump_version(db.session, "character")
+    bump_version(db.session, "favorites")
     db.session.commit()
+    cache.invalidate("character", id)
     response_body = {
         "msg":f"character with {user.id}, named {user.name} deleted"
     }
     return jsonify(response_body), 200
 
 #endpoint para borrar un planeta
-@app.route('/planet/<int:id>', methods=['DELETE'])
+@api.route('/planet/<int:id>', methods=['DELETE'])
 def delete_planet(id):
     user = db.session.execute(db.select(Planets).filter_by(id=id)).scalar_one_or_none()
     if not user:
         return jsonify({"error": "Planet not found"}), 404
+    # sus favoritos los borra la base de datos (ON DELETE CASCADE), sin cargarlos
     db.session.delete(user)
+    bump_version(db.session, "planet")
+    bump_version(db.session, "favorites")
     db.session.commit()
+    cache.invalidate("planet", id)
     response_body = {
         "msg":f"Planet with {user.id}, named {user.name} deleted"
     }
     return jsonify(response_body), 200
 
 #endpoint para borrar un vehiculo
-@app.route('/vehicle/<int:id>', methods=['DELETE'])
+@api.route('/vehicle/<int:id>', methods=['DELETE'])
 def delete_vehicle(id):
     user = db.session.execute(db.select(Vehicles).filter_by(id=id)).scalar_one_or_none()
     if not user:
         return jsonify({"error": "Vehicle not found"}), 404
+    # sus favoritos los borra la base de datos (ON DELETE CASCADE), sin cargarlos
     db.session.delete(user)
+    bump_version(db.session, "vehicle")
+    bump_version(db.session, "favorites")
     db.session.commit()
+    cache.invalidate("vehicle", id)
     response_body = {
         "msg":f"Vehicle with {user.id}, named {user.name} deleted"
     }
     return jsonify(response_body), 200
 
+#endpoint para borrar varios usuarios de una vez: DELETE /user?ids=1,2,3
+@api.route('/user', methods=['DELETE'])
+def bulk_delete_users():
+    ids = read_ids()
+    deleted = bulk_delete(db.session, User, ids)
+    if deleted:
+        bump_version(db.session, "user")
+        bump_version(db.session, "favorites")
+    db.session.commit()
+    response_body = {
+        "deleted": deleted,
+        "not_found": sorted(set(ids) - set(deleted))
+    }
+    return jsonify(response_body), 200
+
+#endpoint para borrar varios personajes de una vez: DELETE /character?ids=1,2,3
+@api.route('/character', methods=['DELETE'])
+def bulk_delete_characters():
+    ids = read_ids()
+    deleted = bulk_delete(db.session, Characters, ids)
+    if deleted:
+        bump_version(db.session, "character")
+        bump_version(db.session, "favorites")
+    db.session.commit()
+    cache.invalidate("character", *deleted)
+    response_body = {
+        "deleted": deleted,
+        "not_found": sorted(set(ids) - set(deleted))
+    }
+    return jsonify(response_body), 200
+
+#endpoint para borrar varios planetas de una vez: DELETE /planet?ids=1,2,3
+@api.route('/planet', methods=['DELETE'])
+def bulk_delete_planets():
+    ids = read_ids()
+    deleted = bulk_delete(db.session, Planets, ids)
+    if deleted:
+        bump_version(db.session, "planet")
+        bump_version(db.session, "favorites")
+    db.session.commit()
+    cache.invalidate("planet", *deleted)
+    response_body = {
+        "deleted": deleted,
+        "not_found": sorted(set(ids) - set(deleted))
+    }
+    return jsonify(response_body), 200
+
+#endpoint para borrar varios vehiculos de una vez: DELETE /vehicle?ids=1,2,3
+@api.route('/vehicle', methods=['DELETE'])
+def bulk_delete_vehicles():
+    ids = read_ids()
+    deleted = bulk_delete(db.session, Vehicles, ids)
+    if deleted:
+        bump_version(db.session, "vehicle")
+        bump_version(db.session, "favorites")
+    db.session.commit()
+    cache.invalidate("vehicle", *deleted)
+    response_body = {
+        "deleted": deleted,
+        "not_found": sorted(set(ids) - set(deleted))
+    }
+    return jsonify(response_body), 200
+
 #endpoint para obtener todos los favoritos de un usuario
-@app.route('/user/<int:user_id>/favorite', methods=['GET'])
+@api.route('/user/<int:user_id>/favorite', methods=['GET'])
+@query_budget(READ_BUDGET)
+@conditional('favorites')
 def get_user_favorites(user_id):
     try:
-        favorite_planets = db.session.scalars(select(Favorites).filter_by(user_id=user_id)).all()
-        favorite_characters = db.session.scalars(select(Favorites).filter_by(user_id=user_id)).all()
-        response_body = {
-            "favorite_planets": [favorite.serialize() for favorite in favorite_planets],
-            "favorite_characters": [favorite.serialize() for favorite in favorite_characters]
-        }
+        expand = request.args.get("expand") in ("1", "true")
+        response_body = user_favorites(db.session, user_id, expand)
         return jsonify(response_body), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+#endpoint con los personajes, planetas o vehiculos con mas favoritos
+@api.route('/top/<entity>', methods=['GET'])
+def top_entities(entity):
+    model = ENTITIES.get(entity)
+    if model is None or model is User:
+        return jsonify({"error": f"Unknown entity {entity}"}), 404
+    response_body = {
+        "results": top_favorites(db.session, model, get_fields(model), get_top_limit())
+    }
+    return jsonify(response_body), 200
+
+
 # endpoint para agregar un personaje a favoritos
-@app.route('/favorite/character', methods=['POST'])
+@api.route('/favorite/character', methods=['POST'])
+@query_budget(FAVORITE_BUDGET)
 def add_favorite_character():
     request_data = request.json
     user_id = request_data.get('user_id')
@@ -273,17 +522,24 @@ def add_favorite_character():
         return jsonify({"error": "user_id and character_id are required"}), 400
 
     try:
+        if db.session.get(User, user_id) is None:
+            return jsonify({"error": f"User with ID {user_id} not found."}), 404
         character = db.session.execute(select(Characters).filter_by(id=character_id)).scalar_one_or_none()
         if not character:
             return jsonify({"error": f"Character with ID {character_id} not found."}), 404
-        existing_favorite = db.session.execute(select(Favorites).filter_by(user_id=user_id, character_id=character_id)).scalar_one_or_none()
-        if existing_favorite:
-            return jsonify({"error": "This character is already in your favorites."}), 400
 
-        # Añadir el personaje a los favoritos
+        # Añadir el personaje a los favoritos, el indice unico (user_id, character_id) evita duplicados
         new_favorite = Favorites(user_id=user_id, character_id=character_id)
         db.session.add(new_favorite)
-        db.session.commit()
+        try:
+            db.session.execute(count_update(Characters, [character_id], 1))
+            bump_version(db.session, "favorites")
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not is_unique_violation(e):
+                raise
+            return jsonify({"error": "This character is already in your favorites."}), 400
 
         return jsonify({"msg": f"Character {character_id} added to user {user_id}'s favorites."}), 200
     except Exception as e:
@@ -291,7 +547,7 @@ def add_favorite_character():
 
 
 # endpoint para eliminar un personaje de favoritos
-@app.route('/favorite/character', methods=['DELETE'])
+@api.route('/favorite/character', methods=['DELETE'])
 def delete_favorite_character():
     request_data = request.json
     user_id = request_data.get('user_id')
@@ -307,6 +563,8 @@ def delete_favorite_character():
             return jsonify({"error": "Character not found in your favorites."}), 404
 
         db.session.delete(favorite)
+        db.session.execute(count_update(Characters, [character_id], -1))
+        bump_version(db.session, "favorites")
         db.session.commit()
 
         return jsonify({"msg": f"Character {character_id} removed from user {user_id}'s favorites."}), 200
@@ -314,7 +572,8 @@ def delete_favorite_character():
         return jsonify({"error": str(e)}), 500
 
 # endpoint para agregar un planeta a favoritos
-@app.route('/favorite/planet', methods=['POST'])
+@api.route('/favorite/planet', methods=['POST'])
+@query_budget(FAVORITE_BUDGET)
 def add_favorite_planet():
     request_data = request.json
     user_id = request_data.get('user_id')
@@ -324,22 +583,30 @@ def add_favorite_planet():
         return jsonify({"error": "user_id and planet_id are required"}), 400
 
     try:
-        # Verificar si el planeta ya está en los favoritos
-        existing_favorite = db.session.execute(select(Favorites).filter_by(user_id=user_id, planet_id=planet_id)).scalar_one_or_none()
-        if existing_favorite:
-            return jsonify({"error": "This planet is already in your favorites."}), 400
+        if db.session.get(User, user_id) is None:
+            return jsonify({"error": f"User with ID {user_id} not found."}), 404
+        if db.session.get(Planets, planet_id) is None:
+            return jsonify({"error": f"Planet with ID {planet_id} not found."}), 404
 
-        # Añadir el planeta a los favoritos
+        # Añadir el planeta a los favoritos, el indice unico (user_id, planet_id) evita duplicados
         new_favorite = Favorites(user_id=user_id, planet_id=planet_id)
         db.session.add(new_favorite)
-        db.session.commit()
+        try:
+            db.session.execute(count_update(Planets, [planet_id], 1))
+            bump_version(db.session, "favorites")
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not is_unique_violation(e):
+                raise
+            return jsonify({"error": "This planet is already in your favorites."}), 400
 
         return jsonify({"msg": f"Planet {planet_id} added to user {user_id}'s favorites."}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # endpoint para eliminar un planeta de favoritos
-@app.route('/favorite/planet', methods=['DELETE'])
+@api.route('/favorite/planet', methods=['DELETE'])
 def delete_favorite_planet():
     request_data = request.json
     user_id = request_data.get('user_id')
@@ -355,6 +622,8 @@ def delete_favorite_planet():
             return jsonify({"error": "Planet not found in your favorites."}), 404
 
         db.session.delete(favorite)
+        db.session.execute(count_update(Planets, [planet_id], -1))
+        bump_version(db.session, "favorites")
         db.session.commit()
 
         return jsonify({"msg": f"Planet {planet_id} removed from user {user_id}'s favorites."}), 200
@@ -363,7 +632,161 @@ def delete_favorite_planet():
 
 
 
+# endpoint para agregar varios favoritos de una vez (idempotente)
+@api.route('/user/<int:user_id>/favorites/batch', methods=['POST'])
+@query_budget(FAVORITES_BATCH_BUDGET)
+def add_favorites_batch(user_id):
+    batch = read_batch(request.json)
+    if db.session.get(User, user_id) is None:
+        return jsonify({"error": f"User with ID {user_id} not found."}), 404
+    for attempt in range(ADD_ATTEMPTS):
+        try:
+            summary, added = add_favorites(db.session, user_id, batch)
+            if added:
+                bump_version(db.session, "favorites")
+            db.session.commit()
+            return jsonify(summary), 200
+        except IntegrityError as e:
+            # otra peticion ha añadido alguno de los mismos favoritos entre la consulta y el insert:
+            # al repetir, esos ya salen como already_favorite
+            db.session.rollback()
+            if not is_unique_violation(e):
+                raise
+    return jsonify({"error": "Favorites were modified concurrently, please retry."}), 409
+
+# endpoint para eliminar varios favoritos de una vez (idempotente)
+@api.route('/user/<int:user_id>/favorites/batch', methods=['DELETE'])
+def delete_favorites_batch(user_id):
+    batch = read_batch(request.json)
+    removed = remove_favorites(db.session, user_id, batch)
+    if removed:
+        bump_version(db.session, "favorites")
+    db.session.commit()
+    return jsonify({"removed": removed}), 200
+
+
+# recalcula los contadores de favoritos desde la tabla favorites: flask reconcile-favorites
+@api.cli.command("reconcile-favorites")
+def reconcile_favorites():
+    fixed = reconcile_counts(db.session)
+    bump_version(db.session, "favorites")
+    db.session.commit()
+    for table, rows in fixed.items():
+        click.echo(f"{table}: {rows} rows fixed")
+
+
+# carga el catalogo desde ficheros JSON/CSV/NDJSON en una transaccion: flask seed data/ (ver src/seed.py)
+@api.cli.command("seed")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--chunk-size", default=SEED_CHUNK_SIZE, show_default=True, type=click.IntRange(min=1),
+              help="Rows per COPY, multi-row INSERT or executemany.")
+def seed_catalog(paths, chunk_size):
+    start = time.perf_counter()
+    total = 0
+    try:
+        for path, rows, seconds in seed_files(db.session, paths, chunk_size):
+            total += rows
+            click.echo(f"{path}: {rows} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):.0f} rows/s)")
+        db.session.commit()
+    except (ValueError, SQLAlchemyError) as error:
+        db.session.rollback()
+        raise click.ClickException(str(getattr(error, "orig", None) or error))
+    elapsed = time.perf_counter() - start
+    click.echo(f"Loaded {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} rows/s, indexes and commit included)")
+
+
+# snapshots columnares del catalogo: flask snapshot export|import (ver src/snapshot.py)
+@api.cli.group("snapshot")
+def snapshot_cli():
+    """Columnar snapshots of users (without passwords), characters, planets, vehicles and favorites."""
+
+
+@snapshot_cli.command("export")
+@click.argument("directory", type=click.Path(file_okay=False))
+@click.option("--format", "fmt", type=click.Choice(list(FORMATS)), default=DEFAULT_FORMAT, show_default=True)
+@click.option("--table", "tables", multiple=True, type=click.Choice(list(SNAPSHOT_TABLES)),
+              help="Tables to export, all by default.")
+def export_snapshot(directory, fmt, tables):
+    """Write one snapshot file per table into DIRECTORY."""
+    os.makedirs(directory, exist_ok=True)
+    for name in tables or SNAPSHOT_TABLES:
+        model = SNAPSHOT_TABLES[name]
+        path = snapshot.snapshot_path(directory, model, fmt)
+        start = time.perf_counter()
+        with open(path, "wb") as f:
+            for rows in snapshot.write_table(db.session, model, f, fmt):
+                pass
+        elapsed = time.perf_counter() - start
+        click.echo(f"{path}: {rows} rows, {os.path.getsize(path)} bytes in {elapsed:.2f}s")
+
+
+@snapshot_cli.command("import")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--chunk-size", default=SEED_CHUNK_SIZE, show_default=True, type=click.IntRange(min=1),
+              help="Rows per COPY, multi-row INSERT or executemany.")
+def import_snapshot(paths, chunk_size):
+    """Load snapshot files (or directories of them) into empty tables, keeping ids."""
+    start = time.perf_counter()
+    total = 0
+    readers = []
+    try:
+        readers = snapshot.open_snapshots(paths)
+        sources = [(reader.path, snapshot.MODELS[reader.table], snapshot.snapshot_rows(reader)) for reader in readers]
+        for path, rows, seconds in load_tables(db.session, sources, chunk_size):
+            total += rows
+            click.echo(f"{path}: {rows} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):.0f} rows/s)")
+        db.session.commit()
+    except (ValueError, SQLAlchemyError) as error:
+        db.session.rollback()
+        raise click.ClickException(str(getattr(error, "orig", None) or error))
+    finally:
+        for reader in readers:
+            reader.close()
+    elapsed = time.perf_counter() - start
+    click.echo(f"Loaded {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} rows/s, indexes and commit included)")
+
+
+def running_cli():
+    # el comando `flask` crea la app dentro de su contexto de click; gunicorn no
+    return click.get_current_context(silent=True) is not None
+
+
+def create_app():
+    """Crea la app con el API y los subsistemas que se usan en cada request.
+
+    El panel de administracion y Flask-Migrate (alembic) solo se importan si hacen falta:
+    el admin con ENABLE_ADMIN=1 (por defecto solo con FLASK_DEBUG) y las migraciones
+    cuando la app la crea el comando `flask` (flask db upgrade, ...). Asi un worker de
+    gunicorn arranca sin cargarlos."""
+    app = Flask(__name__)
+    app.url_map.strict_slashes = False
+    serialization.init_app(app)
+
+    db_config.configure(app)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    db.init_app(app)
+    search.init_app(db)
+    db_config.init_app(app, db)
+    router.init_app(app, db)
+    CORS(app)
+    if db_config.env_bool("ENABLE_ADMIN", app.debug):
+        from admin import setup_admin
+        setup_admin(app)
+    if running_cli():
+        from flask_migrate import Migrate
+        Migrate(app, db, include_object=search.include_object)
+    # los after_request corren en orden inverso al registro: metrics va primero para medir
+    # la respuesta ya comprimida y el tiempo de todos los demas hooks
+    metrics.init_app(app, cache)
+    cache.init_app(app)
+    compression.init_app(app)
+    instrumentation.init_app(app, db)
+    app.register_blueprint(api)
+    return app
+
+
 # this only runs if `$ python src/app.py` is executed
 if __name__ == '__main__':
     PORT = int(os.environ.get('PORT', 3000))
-    app.run(host='0.0.0.0', port=PORT, debug=False)
+    create_app().run(host='0.0.0.0', port=PORT, debug=False)
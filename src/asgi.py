@@ -0,0 +1,248 @@
+"""Punto de entrada ASGI alternativo a wsgi.py.
+
+Sirve las mismas rutas de lectura/escritura del API (colecciones paginadas,
+detalle, alta, borrado y favoritos) con handlers async sobre un AsyncSession
+(asyncpg / aiosqlite / aiomysql), reutilizando los modelos de models.py. Mientras
+una consulta espera a la base de datos el event loop sigue atendiendo otros
+requests, asi un solo proceso puede tener miles de requests en vuelo.
+
+    gunicorn asgi:app -k uvicorn_worker.UvicornWorker --chdir ./src/
+    uvicorn asgi:app --app-dir src --port 3000
+
+Las rutas de administracion, migraciones, metricas, exportacion, snapshots, busqueda,
+rankings y altas y borrados en bloque siguen sirviendose solo desde la app Flask (wsgi.py).
+"""
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import db_config
+from utils import APIException
+from pagination import paginated_query, split_page, page_headers
+from conditional import version_update
+from bulk import BULK_FIELDS
+from favorites import group_favorites, count_update, user_count_updates, is_unique_violation
+from serialization import dumps_bytes, get_fields, projection, page_projection, rows_to_dicts
+from models import Characters, Planets, Vehicles, User, Favorites, ENTITIES
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql"
+}
+
+# mismos textos que devuelven los handlers de app.py
+FAVORITE_KINDS = ("character", "planet")
+LABELS = {"user": "users", "character": "characters", "planet": "planets", "vehicle": "vehicles"}
+CREATE_FIELDS = {User: ("email", "password"), **BULK_FIELDS}
+DELETED = {
+    "user": "User {email} with ID {id} was deleted, along with their favorites.",
+    "character": "character with {id}, named {name} deleted",
+    "planet": "Planet with {id}, named {name} deleted",
+    "vehicle": "Vehicle with {id}, named {name} deleted"
+}
+UNIQUE_ERRORS = {
+    User: "Email is already registered",
+    Characters: "Character with this name already exists",
+    Planets: "Planet with this name already exists",
+    Vehicles: "Vehicle with this name already exists"
+}
+
+
+def async_database_uri():
+    uri = db_config.database_uri()
+    scheme, rest = uri.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def async_engine_options(uri):
+    if uri.startswith("sqlite"):
+        return {}
+    options = db_config.pool_settings()
+    options["pool_size"] = env_pool_size()
+    return options
+
+
+def env_pool_size():
+    # con async un worker atiende muchos requests a la vez: el pool ya no se dimensiona por threads
+    return db_config.env_int("ASYNC_DB_POOL_SIZE", 10, minimum=1)
+
+
+engine = create_async_engine(async_database_uri(), **async_engine_options(async_database_uri()))
+# mismos pragmas que la app Flask (en SQLite, foreign_keys=ON para los ON DELETE CASCADE)
+db_config.setup_engine(engine.sync_engine)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+class JSONResponse(Response):
+    """Igual que jsonify de Flask: claves ordenadas y Decimal como string."""
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps_bytes(content)
+
+
+def error(message, status_code, key="error"):
+    return JSONResponse({key: message}, status_code=status_code)
+
+
+def get_entity(request, key="entity", allowed=ENTITIES):
+    entity = request.path_params[key]
+    if entity not in allowed:
+        raise APIException(f"Unknown entity {entity}", status_code=404)
+    return entity, ENTITIES[entity]
+
+
+async def bump_version(session, name):
+    stmt, first_version = version_update(name)
+    if (await session.execute(stmt)).rowcount == 0:
+        session.add(first_version)
+
+
+async def get_collection(request):
+    entity, model = get_entity(request)
+    fields = get_fields(model, request.query_params)
+    stmt, limit, sort = paginated_query(model, page_projection(model, fields, request.query_params), args=request.query_params)
+    async with Session() as session:
+        items = (await session.execute(stmt)).all()
+    data, next_cursor = split_page(items, limit, sort)
+    if not data and "cursor" not in request.query_params:
+        return error(f"No {LABELS[entity]} found", 404)
+    base_url = str(request.url.replace(query=""))
+    return JSONResponse(
+        {"results": rows_to_dicts(data, fields), "next_cursor": next_cursor},
+        headers=page_headers(next_cursor, base_url, request.query_params)
+    )
+
+
+async def get_single(request):
+    entity, model = get_entity(request)
+    fields = get_fields(model, request.query_params)
+    async with Session() as session:
+        item = (await session.execute(projection(model, fields).where(model.id == request.path_params["id"]))).first()
+    if item is None:
+        return error(f"{entity} does not exist", 404, key="msg")
+    return JSONResponse({"result": dict(zip(fields, item))})
+
+
+async def create(request):
+    entity, model = get_entity(request)
+    request_data = await request.json()
+    missing = [field for field in CREATE_FIELDS[model] if field not in request_data]
+    if missing:
+        return error(f"{', '.join(missing)} required", 400)
+    async with Session() as session:
+        item = model(**{field: request_data[field] for field in CREATE_FIELDS[model]})
+        session.add(item)
+        try:
+            await session.flush()
+            await bump_version(session, entity)
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return error(UNIQUE_ERRORS[model], 400)
+    return JSONResponse({"msg": f"{entity} with ID {item.id} created"})
+
+
+async def delete_single(request):
+    entity, model = get_entity(request)
+    async with Session() as session:
+        item = await session.get(model, request.path_params["id"])
+        if item is None:
+            return error(f"{entity.capitalize()} not found", 404)
+        message = DELETED[entity].format(**item.serialize())
+        if model is User:
+            for stmt in user_count_updates([item.id]):
+                await session.execute(stmt)
+        # los favoritos que apuntan a la fila los borra la base de datos (ON DELETE CASCADE)
+        await session.execute(delete(model).where(model.id == item.id))
+        await bump_version(session, "favorites")
+        await bump_version(session, entity)
+        await session.commit()
+    return JSONResponse({"msg": message})
+
+
+async def get_user_favorites(request):
+    user_id = request.path_params["user_id"]
+    async with Session() as session:
+        favorites = (await session.scalars(
+            select(Favorites).filter_by(user_id=user_id).order_by(Favorites.id)
+        )).all()
+    return JSONResponse(group_favorites(favorites))
+
+
+async def add_favorite(request):
+    kind, model = get_entity(request, "kind", FAVORITE_KINDS)
+    column = f"{kind}_id"
+    request_data = await request.json()
+    user_id = request_data.get("user_id")
+    target_id = request_data.get(column)
+    if not user_id or not target_id:
+        return error(f"user_id and {column} are required", 400)
+    async with Session() as session:
+        if await session.get(User, user_id) is None:
+            return error(f"User with ID {user_id} not found.", 404)
+        if await session.get(model, target_id) is None:
+            return error(f"{kind.capitalize()} with ID {target_id} not found.", 404)
+        session.add(Favorites(user_id=user_id, **{column: target_id}))
+        try:
+            await session.flush()
+            await session.execute(count_update(model, [target_id], 1))
+            await bump_version(session, "favorites")
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            if not is_unique_violation(e):
+                raise
+            return error(f"This {kind} is already in your favorites.", 400)
+    return JSONResponse({"msg": f"{kind.capitalize()} {target_id} added to user {user_id}'s favorites."})
+
+
+async def delete_favorite(request):
+    kind, model = get_entity(request, "kind", FAVORITE_KINDS)
+    column = f"{kind}_id"
+    request_data = await request.json()
+    user_id = request_data.get("user_id")
+    target_id = request_data.get(column)
+    if not user_id or not target_id:
+        return error(f"user_id and {column} are required", 400)
+    async with Session() as session:
+        result = await session.execute(
+            delete(Favorites).where(Favorites.user_id == user_id, getattr(Favorites, column) == target_id)
+        )
+        if result.rowcount == 0:
+            return error(f"{kind.capitalize()} not found in your favorites.", 404)
+        await session.execute(count_update(model, [target_id], -1))
+        await bump_version(session, "favorites")
+        await session.commit()
+    return JSONResponse({"msg": f"{kind.capitalize()} {target_id} removed from user {user_id}'s favorites."})
+
+
+async def handle_api_exception(request, exc):
+    return JSONResponse(exc.to_dict(), status_code=exc.status_code)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+
+routes = [
+    Route("/{entity:str}", get_collection, methods=["GET"]),
+    Route("/{entity:str}/{id:int}", get_single, methods=["GET"]),
+    Route("/{entity:str}", create, methods=["POST"]),
+    Route("/{entity:str}/{id:int}", delete_single, methods=["DELETE"]),
+    Route("/user/{user_id:int}/favorite", get_user_favorites, methods=["GET"]),
+    Route("/favorite/{kind:str}", add_favorite, methods=["POST"]),
+    Route("/favorite/{kind:str}", delete_favorite, methods=["DELETE"]),
+]
+
+app = Starlette(
+    routes=routes,
+    exception_handlers={APIException: handle_api_exception},
+    lifespan=lifespan
+)
@@ -0,0 +1,201 @@
+"""Alta masiva de personajes, planetas y vehiculos.
+
+Un POST /<entidad>/bulk con N elementos cuesta una consulta de duplicados y un
+INSERT ... RETURNING por cada bloque de BULK_CHUNK_SIZE filas, todo dentro de
+una sola transaccion. Los elementos con campos invalidos, o con un nombre que ya
+existe (aunque lo cree otro request a la vez), son errores de ese elemento. Objetivo de rendimiento: cargar el catalogo completo de
+SWAPI (~50k filas) en menos de 5 segundos contra un Postgres local, es decir
+>= 10.000 filas/s, frente a los ~100k round-trips del POST individual.
+
+El borrado masivo (DELETE /<entidad>?ids=1,2,3) es un solo DELETE ... WHERE id IN (...):
+los favoritos que apuntan a esas filas los borra la base de datos (ON DELETE CASCADE).
+"""
+import os
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from flask import request
+from sqlalchemy import select, insert, delete, Integer, Numeric, String
+from sqlalchemy.exc import IntegrityError
+from utils import APIException
+from favorites import user_count_updates
+from models import User, Characters, Planets, Vehicles
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 50000))
+BULK_DELETE_MAX_IDS = int(os.getenv("BULK_DELETE_MAX_IDS", 1000))
+
+# mismos campos que piden los POST individuales
+BULK_FIELDS = {
+    Characters: ("name", "birth_year", "height", "skin_color", "eye_color"),
+    Planets: ("name", "climate", "diameter", "population", "terrain"),
+    Vehicles: ("name", "model", "cargo_capacity", "length", "passengers")
+}
+
+
+def read_items():
+    """Acepta un array JSON, {"items": [...]} o NDJSON (Content-Type: application/x-ndjson)."""
+    if request.mimetype == "application/x-ndjson":
+        try:
+            items = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        except ValueError:
+            raise APIException("Invalid NDJSON body", status_code=400)
+    else:
+        items = request.get_json(silent=True)
+        if isinstance(items, dict):
+            items = items.get("items")
+    if not isinstance(items, list):
+        raise APIException("Expected a JSON array, {\"items\": [...]} or NDJSON", status_code=400)
+    if len(items) > BULK_MAX_ITEMS:
+        raise APIException(f"Too many items, the maximum is {BULK_MAX_ITEMS}", status_code=413)
+    return items
+
+
+def chunks(values, size):
+    # acepta listas o iteradores (flask seed lee los ficheros fila a fila)
+    values = iter(values)
+    while chunk := list(islice(values, size)):
+        yield chunk
+
+
+def existing_names(session, model, names):
+    found = set()
+    for chunk in chunks(names, BULK_CHUNK_SIZE):
+        found.update(session.scalars(select(model.name).where(model.name.in_(chunk))))
+    return found
+
+
+def field_error(column, value):
+    """Por que value no vale para la columna (None si vale): asi un elemento mal formado
+    es un error de ese elemento y no un 500 de la base de datos para todo el bloque."""
+    if value is None:
+        return None if column.nullable else "is required"
+    if isinstance(column.type, String):
+        if not isinstance(value, str):
+            return "must be a string"
+        if not value.strip() and not column.nullable:
+            return "must not be empty"
+        if column.type.length and len(value) > column.type.length:
+            return f"must be at most {column.type.length} characters"
+    elif isinstance(column.type, Integer):
+        if isinstance(value, bool) or not isinstance(value, int):
+            return "must be an integer"
+        if not -2 ** 31 <= value < 2 ** 31:
+            return "is out of range"
+    elif isinstance(column.type, Numeric):
+        try:
+            number = None if isinstance(value, bool) else Decimal(str(value))
+        except InvalidOperation:
+            number = None
+        if number is None or not number.is_finite():
+            return "must be a number"
+        precision, scale = column.type.precision, column.type.scale
+        if precision is not None and abs(number) >= Decimal(10) ** (precision - (scale or 0)):
+            return "is out of range"
+    return None
+
+
+def convert_value(column, value):
+    # los Numeric pueden llegar como string ("1.72")
+    if value is not None and isinstance(column.type, Numeric):
+        return Decimal(str(value))
+    return value
+
+
+def insert_chunk(session, table, chunk):
+    """INSERT del bloque sobre la tabla (no el modelo: el bulk insert del ORM parte el bloque en
+    una sentencia por cada combinacion de columnas NULL); devuelve {name: id}."""
+    if session.get_bind().dialect.insert_executemany_returning:
+        result = session.execute(insert(table).returning(table.c.id, table.c.name), chunk)
+        return {name: id for id, name in result}
+    # MySQL no soporta RETURNING: un multi-row insert y luego una lectura por nombre
+    session.execute(insert(table), chunk)
+    names = [row["name"] for row in chunk]
+    return {name: id for id, name in session.execute(select(table.c.id, table.c.name).where(table.c.name.in_(names)))}
+
+
+def insert_rows(session, model, rows):
+    """Inserta por bloques y devuelve ({name: id}, nombres que ya existian). Cada bloque va en un
+    savepoint: si otro request ha creado alguno de los nombres despues de existing_names, el
+    bloque se repite fila a fila y esas filas quedan como conflicto."""
+    table = model.__table__
+    ids, conflicts = {}, set()
+    for chunk in chunks(rows, BULK_CHUNK_SIZE):
+        try:
+            with session.begin_nested():
+                ids.update(insert_chunk(session, table, chunk))
+        except IntegrityError:
+            for row in chunk:
+                try:
+                    with session.begin_nested():
+                        ids.update(insert_chunk(session, table, [row]))
+                except IntegrityError:
+                    conflicts.add(row["name"])
+    return ids, conflicts
+
+
+def bulk_create(session, model, items):
+    """Valida e inserta los elementos; devuelve (resultados por elemento, numero de creados)."""
+    fields = BULK_FIELDS[model]
+    columns = model.__table__.columns
+    results = [None] * len(items)
+    candidates = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {"index": index, "status": "error", "error": "Item must be an object"}
+            continue
+        missing = [field for field in fields if field not in item]
+        if missing:
+            results[index] = {"index": index, "status": "error", "error": f"Missing fields: {', '.join(missing)}"}
+            continue
+        invalid = [f"{field} {error}" for field in fields if (error := field_error(columns[field], item[field]))]
+        if invalid:
+            results[index] = {"index": index, "status": "error", "error": "; ".join(invalid)}
+            continue
+        candidates.append((index, {field: convert_value(columns[field], item[field]) for field in fields}))
+
+    taken = existing_names(session, model, list({row["name"] for _, row in candidates}))
+    rows = []
+    for index, row in candidates:
+        if row["name"] in taken:
+            results[index] = {"index": index, "status": "error", "error": f"{row['name']} already exists"}
+            continue
+        taken.add(row["name"])
+        rows.append((index, row))
+
+    ids, conflicts = insert_rows(session, model, [row for _, row in rows])
+    for index, row in rows:
+        if row["name"] in conflicts:
+            results[index] = {"index": index, "status": "error", "error": f"{row['name']} already exists"}
+        else:
+            results[index] = {"index": index, "status": "created", "id": ids.get(row["name"]), "name": row["name"]}
+    return results, len(rows) - len(conflicts)
+
+
+def read_ids(args=None):
+    """?ids=1,2,3 -> lista ordenada de ids sin repetir."""
+    args = request.args if args is None else args
+    try:
+        ids = sorted({int(value) for value in args.get("ids", "").split(",") if value.strip()})
+    except ValueError:
+        raise APIException("ids must be a comma separated list of integers", status_code=400)
+    if not ids:
+        raise APIException("ids is required", status_code=400)
+    if len(ids) > BULK_DELETE_MAX_IDS:
+        raise APIException(f"Too many ids, the maximum is {BULK_DELETE_MAX_IDS}", status_code=413)
+    return ids
+
+
+def bulk_delete(session, model, ids):
+    """Borra las filas con un solo DELETE y devuelve los ids que existian. Con User antes se
+    descuentan sus favoritos de los contadores (una sentencia por tipo, sin cargarlos)."""
+    if model is User:
+        for stmt in user_count_updates(ids):
+            session.execute(stmt)
+    stmt = delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+    if session.get_bind().dialect.delete_returning:
+        return sorted(session.scalars(stmt.returning(model.id)))
+    # MySQL no soporta RETURNING: se leen antes los ids que existen
+    found = sorted(session.scalars(select(model.id).where(model.id.in_(ids))))
+    session.execute(stmt)
+    return found
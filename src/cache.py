@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+from functools import wraps
+from collections import OrderedDict
+from flask import request, g, make_response
+import compression
+
+
+class CacheBackend(ABC):
+    """Interfaz minima que tiene que cumplir cualquier backend de cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key):
+        ...
+
+    @abstractmethod
+    def set(self, key, value):
+        ...
+
+    @abstractmethod
+    def delete(self, key):
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def size(self):
+        ...
+
+    def stats(self):
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self.size()
+        }
+
+
+class LRUCache(CacheBackend):
+    """Cache en memoria del proceso, acotada por numero de entradas y por TTL.
+
+    Cada worker de gunicorn tiene su propia copia, asi que una escritura solo
+    invalida la cache del worker que la atiende; el TTL limita cuanto tiempo
+    pueden quedar datos viejos en los demas. Usa RedisCache si eso no vale.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def size(self):
+        return len(self._data)
+
+
+def dump_entry(entry):
+    """Una entrada (body, status, headers, {codificacion: bytes}) en bytes sin pickle: una
+    linea JSON con el status, las cabeceras y el tamaño de cada cuerpo, y despues los cuerpos."""
+    body, status, headers, encoded = entry
+    meta = {"status": status, "headers": headers, "parts": [["", len(body)]]}
+    meta["parts"] += [[encoding, len(data)] for encoding, data in encoded.items()]
+    return json.dumps(meta).encode() + b"\n" + body + b"".join(encoded.values())
+
+
+def load_entry(raw):
+    header, _, data = raw.partition(b"\n")
+    meta = json.loads(header)
+    parts, offset = {}, 0
+    for encoding, length in meta["parts"]:
+        parts[encoding] = data[offset:offset + length]
+        offset += length
+    body = parts.pop("")
+    return body, meta["status"], meta["headers"], parts
+
+
+class RedisCache(CacheBackend):
+    """Backend para cualquier cliente compatible con redis-py (redis, fakeredis, valkey...).
+
+    Las entradas se guardan con dump_entry, no con pickle: quien pueda escribir en Redis no
+    puede ejecutar codigo en los workers. Ademas de las claves, un sorted set (index_key)
+    apunta cada clave con su caducidad; size() lo poda y lo cuenta sin recorrer Redis.
+    """
+
+    def __init__(self, client, ttl=60, namespace="swapi:"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.namespace = namespace
+        self.index_key = namespace + "_entries"
+
+    def get(self, key):
+        raw = self.client.get(self.namespace + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return load_entry(raw)
+
+    def set(self, key, value):
+        pipe = self.client.pipeline()
+        pipe.set(self.namespace + key, dump_entry(value), ex=self.ttl)
+        pipe.zadd(self.index_key, {self.namespace + key: time.time() + self.ttl})
+        pipe.execute()
+
+    def delete(self, key):
+        pipe = self.client.pipeline()
+        pipe.delete(self.namespace + key)
+        pipe.zrem(self.index_key, self.namespace + key)
+        pipe.execute()
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=self.namespace + prefix + "*"))
+        if keys:
+            pipe = self.client.pipeline()
+            pipe.delete(*keys)
+            pipe.zrem(self.index_key, *keys)
+            pipe.execute()
+
+    def clear(self):
+        self.delete_prefix("")
+
+    def size(self):
+        # las claves que ya han caducado en Redis salen del indice antes de contar
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(self.index_key, "-inf", time.time())
+        pipe.zcard(self.index_key)
+        return pipe.execute()[1]
+
+
+class NullCache(CacheBackend):
+
+    def get(self, key):
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def delete_prefix(self, prefix):
+        pass
+
+    def clear(self):
+        pass
+
+    def size(self):
+        return 0
+
+
+def create_backend():
+    kind = os.getenv("CACHE_BACKEND", "memory")
+    ttl = int(os.getenv("CACHE_TTL", 60))
+    if kind == "redis":
+        import redis
+        client = redis.Redis.from_url(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        return RedisCache(client, ttl=ttl)
+    if kind == "none":
+        return NullCache()
+    return LRUCache(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", 1024)), ttl=ttl)
+
+
+class ResponseCache:
+    """Cache read-through de respuestas GET, con claves por entidad/id y por pagina de listado."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+
+    def init_app(self, app, backend=None):
+        self.backend = backend or self.backend or create_backend()
+        app.extensions["response_cache"] = self
+
+    def item_key(self, entity, id):
+        # la query entra en la clave: ?fields= cambia el cuerpo de la respuesta
+        return f"{entity}:item:{id}:{self.version_tag()}:{self.query()}"
+
+    def list_key(self, entity):
+        return f"{entity}:list:{self.version_tag()}:{self.query()}"
+
+    def query(self):
+        return "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+
+    def version_tag(self):
+        # si la vista va con @conditional la version de la tabla entra en la clave, asi una
+        # escritura hecha en otro worker tambien deja sin efecto las entradas de este
+        return f"v{g.get('table_version', 0)}"
+
+    def cached(self, entity):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                id = kwargs.get("id")
+                key = self.item_key(entity, id) if id is not None else self.list_key(entity)
+                entry = self.backend.get(key)
+                if entry is not None:
+                    response = self.encoded_response(key, entry)
+                    response.headers["X-Cache"] = "HIT"
+                    return response
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    headers = {k: v for k, v in response.headers.items() if k in ("Content-Type", "Link")}
+                    response = self.encoded_response(key, (response.get_data(), 200, headers, {}), store=True)
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
+
+    def encoded_response(self, key, entry, store=False):
+        """Respuesta con la codificacion que pide el cliente. Los bytes comprimidos se guardan
+        en la entrada (body, status, headers, {codificacion: bytes}) la primera vez que hacen
+        falta; despues un HIT los sirve tal cual."""
+        body, status, headers, *rest = entry
+        encoded = rest[0] if rest else {}
+        mimetype = headers.get("Content-Type", "").split(";")[0]
+        encoding = compression.negotiate() if compression.compressible(mimetype, len(body)) else None
+        if encoding is not None and encoding not in encoded:
+            encoded[encoding] = compression.compress(body, encoding)
+            store = True
+        if store:
+            self.backend.set(key, (body, status, headers, encoded))
+        response = make_response(encoded[encoding] if encoding else body, status, headers)
+        if encoding is not None:
+            compression.mark_encoded(response, encoding)
+        return response
+
+    def invalidate(self, entity, *ids):
+        """Se llama desde los handlers de escritura: los items de ids y todas las paginas de la entidad."""
+        for id in ids:
+            self.backend.delete_prefix(f"{entity}:item:{id}:")
+        self.backend.delete_prefix(f"{entity}:list:")
+
+    def stats(self):
+        return self.backend.stats()
+
+
+cache = ResponseCache()
@@ -0,0 +1,87 @@
+"""Compresion gzip/brotli de las respuestas, negociada con Accept-Encoding.
+
+Solo se comprimen los tipos de COMPRESSIBLE_TYPES a partir de COMPRESS_MIN_SIZE bytes
+(por debajo la cabecera y la CPU cuestan mas de lo que se ahorra). brotli se usa si
+esta instalado y el cliente lo acepta; si no, gzip.
+
+Cada codificacion es otra representacion: el ETag lleva el sufijo -gzip / -br y la
+respuesta lleva Vary: Accept-Encoding. La cache de respuestas (cache.py) guarda los
+bytes ya comprimidos, asi un HIT no vuelve a comprimir.
+
+    COMPRESS=0                 desactiva (p.ej. si ya comprime el proxy)
+    COMPRESS_MIN_SIZE=1024
+    COMPRESS_LEVEL=6           nivel de gzip (1-9)
+    COMPRESS_BROTLI_QUALITY=5  calidad de brotli (0-11)
+"""
+import os
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS = os.getenv("COMPRESS", "1") != "0"
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 5))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/html", "text/plain")
+
+# por orden de preferencia del servidor
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encodings=None):
+    """La mejor codificacion que acepta el cliente (q > 0), o None."""
+    if not COMPRESS:
+        return None
+    accept_encodings = request.accept_encodings if accept_encodings is None else accept_encodings
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    # mtime=0: los mismos bytes dan el mismo resultado, no cambia con la hora
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+def compressible(mimetype, size):
+    return COMPRESS and mimetype in COMPRESSIBLE_TYPES and size >= COMPRESS_MIN_SIZE
+
+
+def etag_variants(etag):
+    """El ETag sin codificar y sus variantes comprimidas, para los If-None-Match."""
+    return [etag] + [f"{etag}-{encoding}" for encoding in ENCODINGS]
+
+
+def mark_encoded(response, encoding):
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not etag.endswith(f"-{encoding}"):
+        response.set_etag(f"{etag}-{encoding}", weak)
+
+
+def compress_response(response):
+    if response.mimetype not in COMPRESSIBLE_TYPES or not COMPRESS:
+        return response
+    response.vary.add("Accept-Encoding")
+    if (response.direct_passthrough or response.is_streamed or response.status_code in (204, 206, 304)
+            or request.method == "HEAD" or "Content-Encoding" in response.headers):
+        return response
+    encoding = negotiate()
+    if encoding is None or (response.content_length or 0) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(compress(response.get_data(), encoding))
+    mark_encoded(response, encoding)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
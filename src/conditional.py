@@ -0,0 +1,78 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, g, make_response
+from sqlalchemy import select, update
+from compression import etag_variants
+from models import db, TableVersion
+
+
+def version_update(name):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = (
+        update(TableVersion)
+        .where(TableVersion.name == name)
+        .values(version=TableVersion.version + 1, updated_at=now)
+    )
+    return stmt, TableVersion(name=name, version=1, updated_at=now)
+
+
+def bump_version(session, name):
+    """Incrementa el contador de la tabla dentro de la transaccion del handler (antes del commit)."""
+    stmt, first_version = version_update(name)
+    if session.execute(stmt).rowcount == 0:
+        session.add(first_version)
+
+
+def get_version(session, name):
+    row = session.execute(
+        select(TableVersion.version, TableVersion.updated_at).where(TableVersion.name == name)
+    ).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
+
+
+def make_etag(name, version):
+    # la misma version de la tabla con otra url (id, pagina, filtros...) es otra representacion
+    digest = hashlib.sha1(request.full_path.encode()).hexdigest()[:16]
+    return f"{name}-{version}-{digest}"
+
+
+def not_modified(etag, last_modified):
+    """Devuelve el ETag que ya tiene el cliente (con o sin sufijo de compresion) o None."""
+    if request.if_none_match:
+        return next((variant for variant in etag_variants(etag) if request.if_none_match.contains(variant)), None)
+    if last_modified is not None and request.if_modified_since is not None:
+        if last_modified.replace(microsecond=0) <= request.if_modified_since:
+            return etag
+    return None
+
+
+def conditional(name):
+    """Añade ETag/Last-Modified a un GET y contesta 304 sin ejecutar la vista si el cliente ya tiene la version."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, updated_at = get_version(db.session, name)
+            g.table_version = version
+            etag = make_etag(name, version)
+            last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+            current = not_modified(etag, last_modified)
+            if current is not None:
+                # el 304 lleva el mismo ETag que la respuesta que tiene el cliente
+                etag = current
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            if response.headers.get("Content-Encoding") and response.status_code == 200:
+                # la respuesta ya viene comprimida de la cache: mismo sufijo que pondria compression.py
+                etag = f"{etag}-{response.headers['Content-Encoding']}"
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,158 @@
+"""Configuracion del engine de SQLAlchemy a partir de variables de entorno.
+
+Postgres/MySQL:
+    DB_POOL_SIZE          conexiones persistentes por worker (por defecto = GUNICORN_THREADS)
+    DB_MAX_OVERFLOW       conexiones extra temporales por worker (por defecto 2)
+    DB_POOL_TIMEOUT       segundos esperando una conexion libre antes de fallar (30)
+    DB_POOL_RECYCLE       segundos de vida maxima de una conexion, -1 = sin limite (1800)
+    DB_POOL_PRE_PING      1/0, comprobar la conexion antes de usarla (1)
+    DB_STATEMENT_TIMEOUT  milisegundos maximos por sentencia, 0 = sin limite (0)
+    DB_MAX_CONNECTIONS    si se indica, se valida que workers * (pool + overflow) no lo supere
+
+SQLite:
+    SQLITE_JOURNAL_MODE   (WAL)
+    SQLITE_SYNCHRONOUS    (NORMAL)
+    SQLITE_MMAP_SIZE      bytes (268435456)
+    SQLITE_BUSY_TIMEOUT   milisegundos (5000)
+"""
+import os
+from sqlalchemy import event, text
+from metrics import TimedQueuePool
+
+
+def env_int(name, default, minimum=0):
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {raw!r}")
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}, got {value}")
+    return value
+
+
+def env_bool(name, default):
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    return raw.lower() in ("1", "true", "yes", "on")
+
+
+def database_uri():
+    db_url = os.getenv("DATABASE_URL")
+    if db_url is not None:
+        return db_url.replace("postgres://", "postgresql://")
+    return "sqlite:////tmp/test.db"
+
+
+def gunicorn_workers():
+    return env_int("WEB_CONCURRENCY", 2, minimum=1)
+
+
+def gunicorn_threads():
+    return env_int("GUNICORN_THREADS", 1, minimum=1)
+
+
+def pool_settings():
+    settings = {
+        "pool_size": env_int("DB_POOL_SIZE", gunicorn_threads(), minimum=1),
+        "max_overflow": env_int("DB_MAX_OVERFLOW", 2),
+        "pool_timeout": env_int("DB_POOL_TIMEOUT", 30, minimum=1),
+        "pool_recycle": env_int("DB_POOL_RECYCLE", 1800, minimum=-1),
+        "pool_pre_ping": env_bool("DB_POOL_PRE_PING", True)
+    }
+    max_connections = env_int("DB_MAX_CONNECTIONS", 0)
+    needed = gunicorn_workers() * (settings["pool_size"] + settings["max_overflow"])
+    if max_connections and needed > max_connections:
+        raise ValueError(
+            f"{gunicorn_workers()} workers x (DB_POOL_SIZE {settings['pool_size']} + DB_MAX_OVERFLOW "
+            f"{settings['max_overflow']}) = {needed} connections, more than DB_MAX_CONNECTIONS {max_connections}"
+        )
+    return settings
+
+
+def sqlite_pragmas():
+    journal_mode = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+    synchronous = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+    if journal_mode not in ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"):
+        raise ValueError(f"Invalid SQLITE_JOURNAL_MODE {journal_mode}")
+    if synchronous not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS {synchronous}")
+    return {
+        "journal_mode": journal_mode,
+        "synchronous": synchronous,
+        "mmap_size": env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+        "busy_timeout": env_int("SQLITE_BUSY_TIMEOUT", 5000),
+        # SQLite no aplica las claves foraneas (ni ON DELETE CASCADE) si no se activan por conexion
+        "foreign_keys": "ON"
+    }
+
+
+def engine_options(uri):
+    if uri.startswith("sqlite"):
+        if ":memory:" in uri:
+            return {}
+        return {"poolclass": TimedQueuePool}
+    options = dict(pool_settings(), poolclass=TimedQueuePool)
+    timeout = env_int("DB_STATEMENT_TIMEOUT", 0)
+    if timeout and uri.startswith("postgresql"):
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def configure(app):
+    """Se llama antes de db.init_app: fija la URI y las opciones del engine."""
+    uri = database_uri()
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+
+
+def setup_engine(engine):
+    """Se llama con el engine ya creado: pragmas de SQLite o timeout de MySQL en cada conexion nueva."""
+    # con preload_app (gunicorn.conf.py) el engine se crea en el master: cada worker empieza con
+    # el pool vacio en vez de compartir por el fork las conexiones que el master hubiera abierto
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
+    if engine.dialect.name == "sqlite":
+        pragmas = sqlite_pragmas()
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    elif engine.dialect.name == "mysql":
+        timeout = env_int("DB_STATEMENT_TIMEOUT", 0)
+        if timeout:
+            @event.listens_for(engine, "connect")
+            def set_mysql_timeout(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute(f"SET SESSION max_execution_time={timeout}")
+                cursor.close()
+
+
+def engine_summary(engine):
+    """Resumen sin credenciales para /health y el log de arranque."""
+    summary = {"dialect": engine.dialect.name, "pool": type(engine.pool).__name__}
+    if engine.dialect.name == "sqlite":
+        summary["pragmas"] = sqlite_pragmas()
+    else:
+        summary.update(pool_settings())
+        summary["statement_timeout_ms"] = env_int("DB_STATEMENT_TIMEOUT", 0)
+        summary["workers"] = gunicorn_workers()
+    return summary
+
+
+def init_app(app, db):
+    with app.app_context():
+        engine = db.engine
+        setup_engine(engine)
+        app.logger.info("Database engine: %s", engine_summary(engine))
+
+
+def ping(session):
+    session.execute(text("SELECT 1"))
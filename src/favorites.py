@@ -0,0 +1,194 @@
+from sqlalchemy import select, insert, update, delete, exists, func, and_, or_
+from sqlalchemy.orm import joinedload
+from flask import request
+from utils import APIException
+from serialization import projection
+from models import Favorites, Characters, Planets, Vehicles
+
+TOP_DEFAULT_LIMIT = 10
+TOP_MAX_LIMIT = 100
+# reintentos de un lote si otra peticion añade los mismos favoritos a la vez
+ADD_ATTEMPTS = 3
+
+# clave del body -> (modelo, columna de Favorites)
+FAVORITE_TYPES = {
+    "planet_ids": (Planets, "planet_id"),
+    "character_ids": (Characters, "character_id"),
+    "vehicle_ids": (Vehicles, "vehicle_id")
+}
+
+# codigo de violacion de unicidad segun el driver: SQLSTATE de PostgreSQL y errno de MySQL
+UNIQUE_VIOLATION_CODES = ("23505", 1062)
+
+
+def is_unique_violation(error):
+    """True si el IntegrityError viene de un indice unico y no de una FK o un NOT NULL."""
+    orig = error.orig
+    for attr in ("pgcode", "sqlstate", "errno"):
+        if getattr(orig, attr, None) in UNIQUE_VIOLATION_CODES:
+            return True
+    if orig.args and orig.args[0] in UNIQUE_VIOLATION_CODES:
+        return True
+    # sqlite3 no expone el codigo extendido en todas las versiones
+    return getattr(orig, "sqlite_errorname", None) == "SQLITE_CONSTRAINT_UNIQUE" or \
+        str(orig).startswith("UNIQUE constraint failed")
+
+
+def read_batch(request_data):
+    """Valida un body del tipo {"planet_ids": [...], "character_ids": [...], "vehicle_ids": [...]}."""
+    if not isinstance(request_data, dict):
+        raise APIException("Expected a JSON object", status_code=400)
+    batch = {}
+    for key in FAVORITE_TYPES:
+        ids = request_data.get(key, [])
+        if not isinstance(ids, list) or not all(isinstance(id, int) for id in ids):
+            raise APIException(f"{key} must be a list of integers", status_code=400)
+        if ids:
+            batch[key] = sorted(set(ids))
+    if not batch:
+        raise APIException(f"At least one of {', '.join(FAVORITE_TYPES)} is required", status_code=400)
+    return batch
+
+
+def add_favorites(session, user_id, batch):
+    """Añade los favoritos que falten. Una consulta por tipo resuelve a la vez si la entidad
+    existe y si ya era favorita; luego se insertan todos los nuevos en una sola sentencia."""
+    summary = {"added": {}, "already_favorite": {}, "not_found": {}}
+    rows = []
+    for key, ids in batch.items():
+        model, column = FAVORITE_TYPES[key]
+        found = session.execute(
+            select(model.id, Favorites.id)
+            .outerjoin(Favorites, and_(getattr(Favorites, column) == model.id, Favorites.user_id == user_id))
+            .where(model.id.in_(ids))
+        ).all()
+        existing = {entity_id for entity_id, favorite_id in found}
+        already = {entity_id for entity_id, favorite_id in found if favorite_id is not None}
+        added = sorted(existing - already)
+        summary["added"][key] = added
+        summary["already_favorite"][key] = sorted(already)
+        summary["not_found"][key] = sorted(set(ids) - existing)
+        for entity_id in added:
+            # executemany necesita las mismas claves en todas las filas
+            row = {"user_id": user_id, "planet_id": None, "character_id": None, "vehicle_id": None}
+            row[column] = entity_id
+            rows.append(row)
+    if rows:
+        session.execute(insert(Favorites), rows)
+        for key, added in summary["added"].items():
+            if added:
+                session.execute(count_update(FAVORITE_TYPES[key][0], added, 1))
+    return summary, len(rows)
+
+
+def remove_favorites(session, user_id, batch):
+    conditions = []
+    for key, ids in batch.items():
+        model, column = FAVORITE_TYPES[key]
+        conditions.append(getattr(Favorites, column).in_(ids))
+        # se descuentan antes de borrar, solo los que de verdad eran favoritos
+        session.execute(
+            count_update(model, ids, -1).where(
+                exists().where(Favorites.user_id == user_id, getattr(Favorites, column) == model.id)
+            )
+        )
+    result = session.execute(
+        delete(Favorites).where(Favorites.user_id == user_id, or_(*conditions))
+    )
+    return result.rowcount
+
+
+def count_update(model, ids, delta):
+    """UPDATE que suma delta a favorites_count de las entidades ids (sin leerlas)."""
+    return (
+        update(model)
+        .where(model.id.in_(ids))
+        .values(favorites_count=model.favorites_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def favorite_count(model, column, user_ids=None):
+    # subconsulta correlacionada: favoritos de cada fila de model (solo los de user_ids si se indica)
+    stmt = select(func.count(Favorites.id)).where(getattr(Favorites, column) == model.id)
+    if user_ids is not None:
+        stmt = stmt.where(Favorites.user_id.in_(user_ids))
+    return stmt.scalar_subquery()
+
+
+def user_count_updates(user_ids):
+    """Antes de borrar usuarios: descuenta sus favoritos, una sentencia por tipo."""
+    return [
+        update(model)
+        .where(model.id.in_(select(getattr(Favorites, column)).where(Favorites.user_id.in_(user_ids))))
+        .values(favorites_count=model.favorites_count - favorite_count(model, column, user_ids))
+        .execution_options(synchronize_session=False)
+        for model, column in FAVORITE_TYPES.values()
+    ]
+
+
+def reconcile_counts(session):
+    """Recalcula favorites_count desde la tabla favorites y devuelve cuantas filas estaban mal
+    por tabla. Un UPDATE por tabla que solo toca las filas descuadradas."""
+    fixed = {}
+    for model, column in FAVORITE_TYPES.values():
+        actual = favorite_count(model, column)
+        result = session.execute(
+            update(model)
+            .where(model.favorites_count != actual)
+            .values(favorites_count=actual)
+            .execution_options(synchronize_session=False)
+        )
+        fixed[model.__tablename__] = result.rowcount
+    return fixed
+
+
+def get_top_limit(args=None):
+    args = request.args if args is None else args
+    try:
+        limit = int(args.get("limit", TOP_DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise APIException("limit must be an integer", status_code=400)
+    if limit < 1:
+        raise APIException("limit must be greater than 0", status_code=400)
+    return min(limit, TOP_MAX_LIMIT)
+
+
+def top_favorites(session, model, fields, limit):
+    """Las entidades con mas favoritos; el orden coincide con el indice (favorites_count, id)."""
+    stmt = (
+        projection(model, fields)
+        .add_columns(model.favorites_count)
+        .order_by(model.favorites_count.desc(), model.id.desc())
+        .limit(limit)
+    )
+    return [dict(zip(fields + ("favorites_count",), row)) for row in session.execute(stmt)]
+
+
+def user_favorites(session, user_id, expand=False):
+    """Una sola consulta para todos los favoritos del usuario, repartidos por tipo.
+    Con expand los Planets/Characters/Vehicles vienen en la misma consulta (LEFT JOIN)
+    en vez de un lazy load por fila."""
+    stmt = select(Favorites).filter_by(user_id=user_id).order_by(Favorites.id)
+    if expand:
+        stmt = stmt.options(joinedload(Favorites.planet), joinedload(Favorites.character), joinedload(Favorites.vehicle))
+    return group_favorites(session.scalars(stmt), expand)
+
+
+def group_favorites(favorites, expand=False):
+    grouped = {"favorite_planets": [], "favorite_characters": [], "favorite_vehicles": []}
+    for favorite in favorites:
+        item = favorite.serialize()
+        if favorite.planet_id is not None:
+            if expand:
+                item["planet"] = favorite.planet.serialize()
+            grouped["favorite_planets"].append(item)
+        elif favorite.character_id is not None:
+            if expand:
+                item["character"] = favorite.character.serialize()
+            grouped["favorite_characters"].append(item)
+        elif favorite.vehicle_id is not None:
+            if expand:
+                item["vehicle"] = favorite.vehicle.serialize()
+            grouped["favorite_vehicles"].append(item)
+    return grouped
@@ -0,0 +1,181 @@
+"""Filtros y orden de los listados a partir de los query params.
+
+    /planet?climate=arid                     igualdad
+    /planet?climate__in=arid,frozen          IN
+    /vehicle?passengers__gt=100              rangos: gt, gte, lt, lte (y ne)
+    /character?name__prefix=Luke             prefijo (distingue mayusculas)
+    /vehicle?sort=-passengers,name           orden por varias columnas
+
+Solo se aceptan las columnas y operadores de FILTERABLE / SORTABLE, y cada uno
+tiene un indice detras (ver models.py) para que el filtro lo resuelva la base de datos.
+"""
+import sys
+from sqlalchemy import and_, or_, false
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+from utils import APIException
+from models import User, Characters, Planets, Vehicles
+
+EQUALITY = ("eq", "ne", "in")
+RANGE = EQUALITY + ("gt", "gte", "lt", "lte")
+NAME = EQUALITY + ("prefix",)
+
+FILTERABLE = {
+    User: {"id": RANGE, "email": EQUALITY},
+    Characters: {"id": RANGE, "name": NAME, "eye_color": EQUALITY},
+    Planets: {"id": RANGE, "name": NAME, "climate": EQUALITY, "terrain": EQUALITY},
+    Vehicles: {"id": RANGE, "name": NAME, "passengers": RANGE}
+}
+
+SORTABLE = {
+    User: ("id", "email"),
+    Characters: ("id", "name", "eye_color"),
+    Planets: ("id", "name", "climate", "terrain"),
+    Vehicles: ("id", "name", "passengers")
+}
+
+# parametros de las rutas que no son filtros
+RESERVED = ("limit", "cursor", "sort", "fields", "format")
+MAX_IN_VALUES = 100
+
+
+def parse_value(column, raw):
+    try:
+        return column.type.python_type(raw)
+    except (TypeError, ValueError, ArithmeticError):
+        raise APIException(f"Invalid value for {column.key}: {raw}", status_code=400)
+
+
+def condition(column, op, raw):
+    if op == "in":
+        values = [parse_value(column, value) for value in raw.split(",") if value != ""]
+        if not values or len(values) > MAX_IN_VALUES:
+            raise APIException(f"{column.key}__in needs between 1 and {MAX_IN_VALUES} values", status_code=400)
+        return column.in_(values)
+    if op == "prefix":
+        return prefix_condition(column, raw)
+    value = parse_value(column, raw)
+    return {
+        "eq": column == value, "ne": column != value,
+        "gt": column > value, "gte": column >= value,
+        "lt": column < value, "lte": column <= value
+    }[op]
+
+
+def prefix_condition(column, prefix):
+    # el rango name >= 'Lu' AND name < 'Lv' lo resuelve el indice de name en cualquier base
+    # (LIKE solo no: en SQLite no distingue mayusculas y en Postgres depende de la collation);
+    # el LIKE se queda para descartar lo que el rango deja pasar
+    if not prefix:
+        raise APIException(f"{column.key}__prefix cannot be empty", status_code=400)
+    upper = prefix_upper_bound(prefix)
+    if upper is None:
+        return and_(column >= prefix, column.startswith(prefix, autoescape=True))
+    return and_(column >= prefix, column < upper, column.startswith(prefix, autoescape=True))
+
+
+def prefix_upper_bound(prefix):
+    """La menor cadena por encima de todas las que empiezan por prefix, o None si no la hay
+    (prefix hecho solo de U+10FFFF). Los sustitutos (U+D800-U+DFFF) no se pueden codificar
+    en UTF-8: despues de U+D7FF va U+E000."""
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    code = ord(stripped[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000
+    return stripped[:-1] + chr(code)
+
+
+def filter_conditions(model, args):
+    """Lista de condiciones WHERE para los query params de args (request.args o query_params)."""
+    allowed = FILTERABLE.get(model, {})
+    conditions = []
+    for key in sorted(set(args.keys())):
+        if key in RESERVED:
+            continue
+        name, _, op = key.partition("__")
+        op = op or "eq"
+        if name not in allowed:
+            raise APIException(f"Cannot filter by {name}", status_code=400)
+        if op not in allowed[name]:
+            raise APIException(f"Operator {op} is not supported for {name}", status_code=400)
+        column = getattr(model, name)
+        conditions += [condition(column, op, raw) for raw in args.getlist(key)]
+    return conditions
+
+
+def sort_keys(sort):
+    """"-passengers,name" -> [("passengers", True), ("name", False), ("id", True)].
+    id cierra siempre el orden (con la direccion de la primera columna) para que sea total."""
+    keys = []
+    for part in sort.split(","):
+        part = part.strip()
+        keys.append((part.lstrip("-"), part.startswith("-")))
+        if keys[-1][0] == "id":
+            break
+    if keys[-1][0] != "id":
+        keys.append(("id", keys[0][1]))
+    return keys
+
+
+def parse_sort(model, sort):
+    keys = sort_keys(sort)
+    columns = [column for column, descending in keys]
+    for column in columns:
+        if column not in SORTABLE.get(model, ("id",)) or columns.count(column) > 1:
+            raise APIException(f"Cannot sort by {column}", status_code=400)
+    return keys
+
+
+def nullable(model, column):
+    return model.__table__.c[column].nullable
+
+
+def order_clause(model, column, descending):
+    # ASC con los NULL al final y DESC con los NULL al principio, el orden natural de
+    # Postgres: el indice sirve en los dos sentidos y el keyset se puede calcular igual en todas las bases
+    col = getattr(model, column)
+    clause = col.desc() if descending else col.asc()
+    if nullable(model, column):
+        clause = clause.nulls_first() if descending else clause.nulls_last()
+    return clause
+
+
+@compiles(UnaryExpression, "mysql")
+def mysql_nulls_order(element, compiler, **kw):
+    # MySQL no tiene NULLS FIRST/LAST: se ordena antes por "col IS NULL"
+    if element.modifier not in (operators.nulls_last_op, operators.nulls_first_op):
+        return compiler.visit_unary(element, **kw)
+    direction = element.element
+    is_null = f"{compiler.process(direction.element, **kw)} IS NULL"
+    if element.modifier is operators.nulls_first_op:
+        is_null += " DESC"
+    return f"{is_null}, {compiler.process(direction, **kw)}"
+
+
+def after(model, column, descending, value):
+    """Filas que van estrictamente despues de value en el orden de order_clause."""
+    col = getattr(model, column)
+    if value is None:
+        return col.is_not(None) if descending else false()
+    after_value = col < value if descending else col > value
+    if nullable(model, column) and not descending:
+        return or_(after_value, col.is_(None))
+    return after_value
+
+
+def same(model, column, value):
+    col = getattr(model, column)
+    return col.is_(None) if value is None else col == value
+
+
+def keyset_condition(model, keys, values):
+    """(c1, c2, ..., id) > (v1, v2, ..., vid) en la forma OR expandida, que funciona en
+    cualquier base y permite columnas con distinta direccion y valores NULL."""
+    branches = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [same(model, prev, values[j]) for j, (prev, desc) in enumerate(keys[:i])]
+        branches.append(and_(*equal, after(model, column, descending, values[i])))
+    return or_(*branches)
@@ -0,0 +1,145 @@
+"""Instrumentacion SQL por request: numero de sentencias, tiempo en base de datos,
+filas afectadas y objetos ORM cargados, con deteccion de N+1 (la misma sentencia
+repetida muchas veces en un request, tipicamente un lazy load por fila).
+
+Se publica en la cabecera Server-Timing y en el log (nivel DEBUG, WARNING si hay
+sospecha de N+1 o se supera el presupuesto de consultas).
+"""
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+# execution option de las consultas que no son del request (p.ej. el health check de las
+# replicas): no cuentan para las estadisticas ni para el presupuesto
+UNCOUNTED = "sql_stats_skip"
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class SQLStats:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.rows = 0
+        self.loads = 0
+        self.statements = Counter()
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+    def to_dict(self):
+        return {
+            "queries": self.count,
+            "db_time_ms": round(self.duration * 1000, 2),
+            "rows": self.rows,
+            "orm_loads": self.loads,
+            "repeated": self.repeated()
+        }
+
+
+def current_stats():
+    # fuera de un request (CLI, shell) no se acumula nada
+    if not has_app_context():
+        return None
+    return g.get("sql_stats")
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_start = time.perf_counter()
+
+
+def counted(context):
+    return not context.execution_options.get(UNCOUNTED, False)
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    if stats is None or not counted(context):
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - context.query_start
+    stats.statements[statement] += 1
+    if cursor.rowcount and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+def on_load(target, context):
+    stats = current_stats()
+    if stats is not None:
+        stats.loads += 1
+
+
+def start_request():
+    g.sql_stats = SQLStats()
+
+
+def finish_request(response):
+    stats = g.get("sql_stats")
+    if stats is None:
+        return response
+    response.headers.add(
+        "Server-Timing",
+        f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+    )
+    logger = current_app.logger
+    logger.debug("SQL %s", stats.to_dict())
+    for sql, n in stats.repeated().items():
+        logger.warning("Possible N+1: statement executed %d times: %s", n, " ".join(sql.split())[:200])
+
+    budget = g.get("sql_budget", current_app.config.get("SQL_QUERY_BUDGET"))
+    if budget is not None and stats.count > budget:
+        message = f"{stats.count} queries exceed the budget of {budget}"
+        if current_app.config.get("SQL_BUDGET_STRICT"):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+
+def query_budget(limit):
+    """Fija el maximo de consultas de una ruta; con SQL_BUDGET_STRICT (p.ej. en tests) superarlo es un error."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.sql_budget = limit
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def count_queries():
+    """Para tests: `with count_queries() as stats: client.get(...)` y luego mirar stats.count."""
+    stats = SQLStats()
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if not counted(context):
+            return
+        stats.count += 1
+        stats.statements[statement] += 1
+
+    event.listen(Engine, "after_cursor_execute", listener)
+    try:
+        yield stats
+    finally:
+        event.remove(Engine, "after_cursor_execute", listener)
+
+
+def init_app(app, db):
+    if os.getenv("SQL_INSTRUMENTATION", "1") == "0":
+        return
+    # a nivel de clase Engine para cubrir cualquier engine que se cree (primario, replicas...)
+    if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(db.Model, "load", on_load, propagate=True)
+    app.before_request(start_request)
+    app.after_request(finish_request)
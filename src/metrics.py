@@ -0,0 +1,139 @@
+"""Metricas en formato Prometheus expuestas en /metrics.
+
+Con gunicorn cada worker es un proceso distinto: si PROMETHEUS_MULTIPROC_DIR
+apunta a un directorio compartido (vacio al arrancar), prometheus_client escribe
+ahi los valores de cada worker y /metrics los agrega todos. gunicorn.conf.py se
+encarga de limpiar los ficheros de los workers que mueren.
+"""
+import os
+import time
+import weakref
+import threading
+from flask import g, request, Response
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from prometheus_client import (
+    Counter, Histogram, Gauge, CollectorRegistry, generate_latest,
+    CONTENT_TYPE_LATEST, REGISTRY, multiprocess
+)
+
+REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size", ["route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+DB_TIME = Histogram("db_time_per_request_seconds", "Time spent in the database per request", ["route"])
+
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out from the pool")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond pool_size", multiprocess_mode="livesum")
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time waiting to get a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+CACHE_EVENTS = Counter("response_cache_events_total", "Response cache hits, misses and evictions", ["event"])
+CACHE_SIZE = Gauge("response_cache_entries", "Entries in the response cache", multiprocess_mode="livesum")
+
+# por backend, los totales ya sumados a CACHE_EVENTS
+published_cache_events = weakref.WeakKeyDictionary()
+published_lock = threading.Lock()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuanto se espera por una conexion (incluye abrirla si hace falta)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - start)
+            POOL_OVERFLOW.set(max(self.overflow(), 0))
+
+
+def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKOUTS.inc()
+    POOL_CHECKED_OUT.inc()
+
+
+def on_checkin(dbapi_connection, connection_record):
+    POOL_CHECKED_OUT.dec()
+
+
+def route_label():
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def start_timer():
+    g.metrics_start = time.perf_counter()
+
+
+def record_request(response):
+    start = g.get("metrics_start")
+    if start is None:
+        return response
+    route = route_label()
+    REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+    LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+    if response.content_length is not None:
+        RESPONSE_SIZE.labels(route).observe(response.content_length)
+    stats = g.get("sql_stats")
+    if stats is not None:
+        DB_QUERIES.labels(route).observe(stats.count)
+        DB_TIME.labels(route).observe(stats.duration)
+    return response
+
+
+def record_cache(cache):
+    # el backend lleva totales acumulados; al Counter solo se le suma lo nuevo desde la
+    # ultima vez, asi en modo multiproceso no se pierde lo contado por workers ya muertos
+    backend = cache.backend
+    with published_lock:
+        published = published_cache_events.setdefault(backend, {})
+        for name in ("hits", "misses", "evictions"):
+            value = getattr(backend, name)
+            delta = value - published.get(name, 0)
+            if delta > 0:
+                CACHE_EVENTS.labels(name).inc(delta)
+            published[name] = value
+
+
+def metrics_view(cache=None):
+    if cache is not None:
+        record_cache(cache)
+        CACHE_SIZE.set(cache.backend.size())
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app, cache=None):
+    if not event.contains(QueuePool, "checkout", on_checkout):
+        event.listen(QueuePool, "checkout", on_checkout)
+        event.listen(QueuePool, "checkin", on_checkin)
+    app.before_request(start_timer)
+    app.after_request(record_request)
+
+    if cache is not None:
+        # los contadores de la cache son por proceso: se publican al final de cada request
+        # para que en modo multiproceso tambien lleguen los de los otros workers
+        @app.after_request
+        def record_cache_counters(response):
+            record_cache(cache)
+            return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return metrics_view(cache)
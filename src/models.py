@@ -1,20 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
+from replicas import RoutingSession
 from sqlalchemy.orm import mapped_column
-from sqlalchemy import Integer, String, Boolean, Numeric
+from sqlalchemy import Integer, String, Boolean, Numeric, DateTime
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class User(db.Model):
     __tablename__ = "user"
 
     id = mapped_column(Integer, primary_key=True)
-    email = mapped_column(String(120), nullable=False)
+    email = mapped_column(String(120), nullable=False, unique=True, index=True)
     password = mapped_column(String(80))
     is_active = mapped_column(Boolean)
 
-    #relacion con Favorites usando cascade para eliminar automáticamente los favoritos cuando se elimine un usuario
-    favorites = db.relationship('Favorites', backref='user', cascade="all, delete-orphan", lazy=True)
+    #relacion con Favorites: los favoritos se borran con el usuario por el ON DELETE CASCADE de la base de datos;
+    #passive_deletes evita que el ORM los cargue para borrarlos uno a uno
+    favorites = db.relationship('Favorites', backref='user', cascade="all, delete-orphan", passive_deletes=True, lazy=True)
 
     def __repr__(self):
         return '<User %r>' % self.email
@@ -28,13 +30,16 @@ class User(db.Model):
 
 class Characters(db.Model):
     __tablename__ = "characters"
+    __table_args__ = (db.Index("ix_characters_popularity", "favorites_count", "id"),)
 
     id = mapped_column(Integer, primary_key=True)
-    name = mapped_column(String(120), nullable=False)
+    name = mapped_column(String(120), nullable=False, unique=True, index=True)
     birth_year = mapped_column(String(80))
     height = mapped_column(Numeric(4,2))
     skin_color = mapped_column(String(20))
-    eye_color = mapped_column(String(20))
+    eye_color = mapped_column(String(20), index=True)
+    # numero de usuarios que lo tienen en favoritos, lo mantienen los handlers de favoritos
+    favorites_count = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     def __repr__(self):
         return '<Characters %r>' % self.username
@@ -46,18 +51,21 @@ class Characters(db.Model):
             "birth_year": self.birth_year,
             "height": self.height,
             "skin_color": self.skin_color,
-            "eye_color": self.skin_color
+            "eye_color": self.eye_color
         }
 
 class Planets(db.Model):
     __tablename__ = "planets"
+    __table_args__ = (db.Index("ix_planets_popularity", "favorites_count", "id"),)
 
     id = mapped_column(Integer, primary_key=True)
-    name = mapped_column(String(120), nullable=False)
-    climate = mapped_column(String(80))
+    name = mapped_column(String(120), nullable=False, unique=True, index=True)
+    climate = mapped_column(String(80), index=True)
     diameter = mapped_column(Integer)
     population = mapped_column(Integer)
-    terrain = mapped_column(String(20))
+    terrain = mapped_column(String(20), index=True)
+    # numero de usuarios que lo tienen en favoritos, lo mantienen los handlers de favoritos
+    favorites_count = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     def __repr__(self):
         return '<Planets %r>' % self.username
@@ -74,13 +82,16 @@ class Planets(db.Model):
 
 class Vehicles(db.Model):
     __tablename__ = "vehicles"
+    __table_args__ = (db.Index("ix_vehicles_popularity", "favorites_count", "id"),)
 
     id = mapped_column(Integer, primary_key=True)
-    name = mapped_column(String(120), nullable=False)
+    name = mapped_column(String(120), nullable=False, unique=True, index=True)
     model = mapped_column(String(80))
     cargo_capacity = mapped_column(Integer)
     length = mapped_column(Numeric(None,2))
-    passengers = mapped_column(Integer)
+    passengers = mapped_column(Integer, index=True)
+    # numero de usuarios que lo tienen en favoritos, lo mantienen los handlers de favoritos
+    favorites_count = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     def __repr__(self):
         return '<Vehicles %r>' % self.username
@@ -98,17 +109,25 @@ class Vehicles(db.Model):
 
 class Favorites(db.Model):
     __tablename__ = "favorites"
+    # un mismo favorito no puede repetirse; user_id va primero para que estos indices
+    # sirvan tambien para las busquedas por usuario
+    __table_args__ = (
+        db.Index("ix_favorites_user_planet", "user_id", "planet_id", unique=True),
+        db.Index("ix_favorites_user_character", "user_id", "character_id", unique=True),
+        db.Index("ix_favorites_user_vehicle", "user_id", "vehicle_id", unique=True),
+    )
 
     id = mapped_column(Integer, primary_key=True)
-    user_id = mapped_column(Integer, db.ForeignKey('user.id'), nullable=False)
-    planet_id = mapped_column(Integer, db.ForeignKey('planets.id'), nullable=True)
-    character_id = mapped_column(Integer, db.ForeignKey('characters.id'), nullable=True)
-    vehicle_id = mapped_column(Integer, db.ForeignKey('vehicles.id'), nullable=True)
+    # al borrar el usuario o la entidad la base de datos borra sus favoritos (ON DELETE CASCADE)
+    user_id = mapped_column(Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False)
+    planet_id = mapped_column(Integer, db.ForeignKey('planets.id', ondelete="CASCADE"), nullable=True, index=True)
+    character_id = mapped_column(Integer, db.ForeignKey('characters.id', ondelete="CASCADE"), nullable=True, index=True)
+    vehicle_id = mapped_column(Integer, db.ForeignKey('vehicles.id', ondelete="CASCADE"), nullable=True, index=True)
 
     # Relaciones con los otros modelos
-    planet = db.relationship('Planets', backref='favorites', lazy=True)
-    character = db.relationship('Characters', backref='favorites', lazy=True)
-    vehicle = db.relationship('Vehicles', backref='favorites', lazy=True)
+    planet = db.relationship('Planets', backref=db.backref('favorites', passive_deletes=True), lazy=True)
+    character = db.relationship('Characters', backref=db.backref('favorites', passive_deletes=True), lazy=True)
+    vehicle = db.relationship('Vehicles', backref=db.backref('favorites', passive_deletes=True), lazy=True)
 
     def __repr__(self):
         return '<Favorites %r>' % self.user_id
@@ -122,3 +141,24 @@ class Favorites(db.Model):
             "vehicle_id": self.vehicle_id
         }
 
+
+
+class TableVersion(db.Model):
+    __tablename__ = "table_versions"
+
+    # contador de cambios por tabla, lo incrementan los handlers de escritura
+    # y se usa para generar ETag/Last-Modified sin cargar las filas
+    name = mapped_column(String(50), primary_key=True)
+    version = mapped_column(Integer, nullable=False, default=0)
+    updated_at = mapped_column(DateTime)
+
+    def __repr__(self):
+        return '<TableVersion %r>' % self.name
+
+# nombre usado en las rutas -> modelo
+ENTITIES = {
+    "user": User,
+    "character": Characters,
+    "planet": Planets,
+    "vehicle": Vehicles
+}
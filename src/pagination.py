@@ -0,0 +1,131 @@
+import os
+import json
+import base64
+from urllib.parse import urlencode
+from flask import request
+from sqlalchemy import select, Integer, String
+from utils import APIException
+from filters import filter_conditions, keyset_condition, order_clause, parse_sort, sort_keys
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+
+
+def encode_cursor(sort, values):
+    raw = json.dumps({"s": sort, "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return data["s"], data["k"]
+    except Exception:
+        raise APIException("Invalid cursor", status_code=400)
+
+
+def get_page_size(args=None):
+    args = request.args if args is None else args
+    limit = args.get("limit", DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise APIException("limit must be an integer", status_code=400)
+    if limit < 1:
+        raise APIException("limit must be greater than 0", status_code=400)
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def get_sort(model, args=None):
+    args = request.args if args is None else args
+    sort = args.get("sort", "id")
+    parse_sort(model, sort)
+    return sort
+
+
+def valid_cursor_value(column, value):
+    """El cursor viene del cliente: cada valor tiene que ser del tipo de su columna, o Postgres
+    devuelve un error (un texto comparado con un integer, un entero fuera de rango, un NUL)."""
+    if value is None:
+        return column.nullable
+    if isinstance(column.type, Integer):
+        return isinstance(value, int) and not isinstance(value, bool) and -2 ** 31 <= value < 2 ** 31
+    if isinstance(column.type, String):
+        return isinstance(value, str) and "\x00" not in value
+    return isinstance(value, (int, float, str)) and not isinstance(value, bool)
+
+
+def keyset_filter(model, sort, values):
+    keys = parse_sort(model, sort)
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise APIException("Invalid cursor", status_code=400)
+    for (column, descending), value in zip(keys, values):
+        if not valid_cursor_value(model.__table__.c[column], value):
+            raise APIException("Invalid cursor", status_code=400)
+    return keyset_condition(model, keys, values)
+
+
+def order_by(model, sort):
+    return [order_clause(model, column, descending) for column, descending in parse_sort(model, sort)]
+
+
+def cursor_values(item, sort):
+    return [getattr(item, column) for column, descending in sort_keys(sort)]
+
+
+def paginated_query(model, stmt=None, args=None):
+    """Devuelve (statement, limit, sort) listos para ejecutar una pagina por keyset.
+    args permite usarlo fuera de Flask (p.ej. con los query params de asgi.py)."""
+    args = request.args if args is None else args
+    limit = get_page_size(args)
+    sort = get_sort(model, args)
+    if stmt is None:
+        stmt = select(model)
+    stmt = stmt.where(*filter_conditions(model, args))
+    cursor = args.get("cursor")
+    if cursor:
+        cursor_sort, values = decode_cursor(cursor)
+        if cursor_sort != sort:
+            raise APIException("Cursor does not match the requested sort", status_code=400)
+        stmt = stmt.where(keyset_filter(model, sort, values))
+    # pedimos una fila extra para saber si hay pagina siguiente sin hacer COUNT(*)
+    stmt = stmt.order_by(*order_by(model, sort)).limit(limit + 1)
+    return stmt, limit, sort
+
+
+def next_page_link(next_cursor, base_url=None, args=None):
+    """Cabecera Link de la pagina siguiente; base_url y args para usarla fuera de Flask (asgi.py)."""
+    args = request.args.to_dict() if args is None else dict(args)
+    args["cursor"] = next_cursor
+    base_url = request.base_url if base_url is None else base_url
+    return f'<{base_url}?{urlencode(args)}>; rel="next"'
+
+
+def split_page(items, limit, sort):
+    """Quita la fila extra y calcula el cursor de la pagina siguiente."""
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(sort, cursor_values(items[-1], sort))
+    return items, next_cursor
+
+
+def selects_entity(stmt, model):
+    descriptions = stmt.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is model
+
+
+def paginate(session, model, stmt=None):
+    """Ejecuta una pagina y devuelve (items, next_cursor). Con un select de columnas
+    (serialization.projection) los items son Rows en vez de objetos del modelo."""
+    stmt, limit, sort = paginated_query(model, stmt)
+    result = session.execute(stmt)
+    items = result.scalars().all() if selects_entity(stmt, model) else result.all()
+    return split_page(items, limit, sort)
+
+
+def page_headers(next_cursor, base_url=None, args=None):
+    if next_cursor is None:
+        return {}
+    return {"Link": next_page_link(next_cursor, base_url, args)}
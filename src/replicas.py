@@ -0,0 +1,132 @@
+"""Enrutado de lecturas a replicas.
+
+Con DATABASE_REPLICA_URLS="url1,url2" los GET/HEAD leen de las replicas en
+round-robin; cualquier escritura (flush, INSERT/UPDATE/DELETE, DDL) va al primario y,
+a partir de ahi, el resto del request tambien lee del primario. Tras una
+escritura el cliente recibe una cookie que le mantiene en el primario durante
+REPLICA_STICKY_SECONDS para que vea sus propios cambios aunque haya lag.
+
+Una replica que falla el ping (SELECT 1, como mucho cada REPLICA_HEALTH_INTERVAL
+segundos) se saca de la rotacion hasta el siguiente chequeo. Sin replicas sanas
+se lee del primario.
+"""
+import os
+import re
+import time
+import threading
+from itertools import count
+from flask import g, request, has_request_context, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, text
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.ddl import ExecutableDDLElement
+import db_config
+from instrumentation import UNCOUNTED
+
+STICKY_COOKIE = "primary_until"
+# text() de solo lectura (/search, el ping de /health)
+READ_SQL = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def is_write(clause):
+    """Escrituras por tipo de sentencia: INSERT/UPDATE/DELETE, DDL, SELECT ... FOR UPDATE
+    y el SQL en texto que no empiece por SELECT o WITH."""
+    if isinstance(clause, (UpdateBase, ExecutableDDLElement)):
+        return True
+    if isinstance(clause, TextClause):
+        return not READ_SQL.match(clause.text)
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+class Replica:
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.healthy = True
+        self.checked_at = 0.0
+
+    def check(self, interval):
+        now = time.monotonic()
+        if now - self.checked_at < interval:
+            return self.healthy
+        self.checked_at = now
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1").execution_options(**{UNCOUNTED: True}))
+            self.healthy = True
+        except Exception:
+            if self.healthy:
+                current_app.logger.warning("Replica %s is down, reading from the others", self.engine.url.render_as_string(hide_password=True))
+            self.healthy = False
+        return self.healthy
+
+
+class ReplicaRouter:
+
+    def __init__(self):
+        self.db = None
+        self.replicas = []
+        self.sticky_seconds = 0
+        self.health_interval = 5
+        self._counter = count()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        self.db = db
+        urls = [url.strip().replace("postgres://", "postgresql://") for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+        self.replicas = []
+        for url in urls:
+            # mismas opciones de pool y pragmas que el primario
+            engine = create_engine(url, **db_config.engine_options(url))
+            db_config.setup_engine(engine)
+            self.replicas.append(Replica(engine))
+        self.sticky_seconds = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+        self.health_interval = int(os.getenv("REPLICA_HEALTH_INTERVAL", 5))
+        app.extensions["replica_router"] = self
+        if self.replicas:
+            app.before_request(self.choose_target)
+            app.after_request(self.mark_sticky)
+
+    def choose_target(self):
+        sticky = request.cookies.get(STICKY_COOKIE, "0")
+        g.read_from_replica = (
+            request.method in ("GET", "HEAD")
+            and not (sticky.isdigit() and int(sticky) > time.time())
+        )
+
+    def mark_sticky(self, response):
+        if self.db.session.info.get("wrote") and response.status_code < 400:
+            until = int(time.time()) + self.sticky_seconds
+            response.set_cookie(STICKY_COOKIE, str(until), max_age=self.sticky_seconds, httponly=True, samesite="Lax")
+        return response
+
+    def next_replica(self):
+        with self._lock:
+            start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.check(self.health_interval):
+                return replica.engine
+        return None
+
+
+class RoutingSession(Session):
+    """Session de Flask-SQLAlchemy que manda las lecturas a una replica cuando el request lo permite."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            writing = self._flushing or (clause is not None and is_write(clause))
+            if writing:
+                self.info["wrote"] = True
+            elif g.get("read_from_replica") and not self.info.get("wrote"):
+                # una sola replica por request, para que todas las lecturas vean el mismo estado
+                if "replica" not in self.info:
+                    router = current_app.extensions.get("replica_router")
+                    self.info["replica"] = router.next_replica() if router is not None else None
+                if self.info["replica"] is not None:
+                    return self.info["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+router = ReplicaRouter()
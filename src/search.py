@@ -0,0 +1,170 @@
+"""Busqueda de texto en Characters, Planets y Vehicles (/search?q=).
+
+- Postgres: indice GIN sobre una expresion to_tsvector por tabla (el nombre pesa mas
+  que el resto de atributos); lo mantiene la propia base de datos, sin triggers.
+- SQLite: tabla virtual FTS5 search_index, mantenida por triggers en las tres tablas.
+  El rowid codifica tipo e id (id * 4 + tipo) para que los triggers borren por clave.
+- Otras bases (MySQL): LIKE sobre el nombre, sin ranking.
+
+En todos los casos es una sola consulta, ordenada por relevancia y paginada con un
+cursor opaco (offset) como el de los listados.
+"""
+import re
+from sqlalchemy import event, text
+from utils import APIException
+from pagination import encode_cursor, decode_cursor, get_page_size
+
+# tipo -> (tabla, codigo en el rowid de FTS5, columnas con texto; la primera es el nombre)
+SEARCHABLE = {
+    "character": ("characters", 1, ("name", "birth_year", "skin_color", "eye_color")),
+    "planet": ("planets", 2, ("name", "climate", "terrain")),
+    "vehicle": ("vehicles", 3, ("name", "model"))
+}
+TYPES_BY_CODE = {code: kind for kind, (table, code, columns) in SEARCHABLE.items()}
+FTS_TABLE = "search_index"
+MAX_OFFSET = 10000
+MAX_TERMS = 8
+
+
+def attributes_sql(columns, prefix=""):
+    return " || ' ' || ".join(f"coalesce({prefix}{column}, '')" for column in columns[1:])
+
+
+def pg_vector(columns):
+    """Expresion del indice GIN; la consulta tiene que usar exactamente la misma."""
+    return (f"(setweight(to_tsvector('simple', coalesce({columns[0]}, '')), 'A') || "
+            f"setweight(to_tsvector('simple', {attributes_sql(columns)}), 'B'))")
+
+
+def postgres_ddl():
+    return [
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin ({pg_vector(columns)})"
+        for table, code, columns in SEARCHABLE.values()
+    ]
+
+
+def sqlite_ddl():
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(name, attributes, tokenize='unicode61 remove_diacritics 2')"
+    ]
+    for table, code, columns in SEARCHABLE.values():
+        insert = (f"INSERT INTO {FTS_TABLE}(rowid, name, attributes) "
+                  f"VALUES (new.id * 4 + {code}, new.{columns[0]}, {attributes_sql(columns, 'new.')})")
+        delete = f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id * 4 + {code}"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN {insert}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN {delete}; END",
+            # solo si cambia alguna columna indexada (no con cada cambio de favorites_count)
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {', '.join(columns)} ON {table} "
+            f"BEGIN {delete}; {insert}; END",
+            # rellena el indice con lo que ya hubiera en la tabla
+            f"INSERT INTO {FTS_TABLE}(rowid, name, attributes) "
+            f"SELECT id * 4 + {code}, {columns[0]}, {attributes_sql(columns)} FROM {table} "
+            f"WHERE id * 4 + {code} NOT IN (SELECT rowid FROM {FTS_TABLE})"
+        ]
+    return statements
+
+
+def create_search_index(target, connection, **kw):
+    """after_create de la metadata: db.create_all() deja la busqueda lista igual que las migraciones."""
+    ddl = {"postgresql": postgres_ddl, "sqlite": sqlite_ddl}.get(connection.dialect.name)
+    if ddl is not None:
+        for statement in ddl():
+            connection.execute(text(statement))
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Para Migrate(include_object=...): autogenerate no debe proponer borrar la tabla FTS5
+    (ni sus tablas internas) ni los indices GIN, que no estan en los modelos."""
+    if type_ == "table" and reflected and compare_to is None and name.startswith(FTS_TABLE):
+        return False
+    if type_ == "index" and name.endswith("_search"):
+        return False
+    return True
+
+
+def search_terms(q):
+    terms = re.findall(r"\w+", q or "")[:MAX_TERMS]
+    if not terms:
+        raise APIException("q must contain at least one word", status_code=400)
+    return terms
+
+
+def get_types(args):
+    types = args.get("type")
+    if not types:
+        return list(SEARCHABLE)
+    types = [kind.strip() for kind in types.split(",") if kind.strip()]
+    unknown = [kind for kind in types if kind not in SEARCHABLE]
+    if unknown or not types:
+        raise APIException(f"type must be one of {', '.join(SEARCHABLE)}", status_code=400)
+    return types
+
+
+def get_offset(args):
+    cursor = args.get("cursor")
+    if not cursor:
+        return 0
+    kind, values = decode_cursor(cursor)
+    if kind != "search" or not values or not isinstance(values[0], int) or not 0 <= values[0] <= MAX_OFFSET:
+        raise APIException("Invalid cursor", status_code=400)
+    return values[0]
+
+
+def postgres_query(terms, types):
+    # cada palabra como prefijo: "luk sky" encuentra "Luke Skywalker"
+    params = {"q": " & ".join(f"{term}:*" for term in terms)}
+    branches = []
+    for kind in types:
+        table, code, columns = SEARCHABLE[kind]
+        vector = pg_vector(columns)
+        branches.append(
+            f"SELECT '{kind}' AS type, id, {columns[0]} AS name, ts_rank({vector}, query) AS score "
+            f"FROM {table}, to_tsquery('simple', :q) AS query WHERE {vector} @@ query"
+        )
+    return " UNION ALL ".join(branches) + " ORDER BY score DESC, type, id", params
+
+
+def sqlite_query(terms, types):
+    params = {"q": " ".join('"' + term.replace('"', '""') + '"*' for term in terms)}
+    codes = ", ".join(str(SEARCHABLE[kind][1]) for kind in types)
+    # bm25 devuelve valores negativos: cuanto mas bajo, mas relevante; el nombre pesa 10 veces mas
+    sql = (f"SELECT rowid % 4 AS type, rowid / 4 AS id, name, -bm25({FTS_TABLE}, 10.0, 1.0) AS score "
+           f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q AND rowid % 4 IN ({codes}) ORDER BY score DESC, rowid")
+    return sql, params
+
+
+def fallback_query(terms, types):
+    params = {f"t{i}": f"%{term}%" for i, term in enumerate(terms)}
+    branches = []
+    for kind in types:
+        table, code, columns = SEARCHABLE[kind]
+        where = " AND ".join(f"lower({columns[0]}) LIKE lower(:t{i})" for i in range(len(terms)))
+        branches.append(f"SELECT '{kind}' AS type, id, {columns[0]} AS name, 0 AS score FROM {table} WHERE {where}")
+    return " UNION ALL ".join(branches) + " ORDER BY type, id", params
+
+
+def search(session, args):
+    """Devuelve (resultados, next_cursor) para los query params q, type, limit y cursor."""
+    terms = search_terms(args.get("q"))
+    types = get_types(args)
+    limit = get_page_size(args)
+    offset = get_offset(args)
+    dialect = session.get_bind().dialect.name
+    build = {"postgresql": postgres_query, "sqlite": sqlite_query}.get(dialect, fallback_query)
+    sql, params = build(terms, types)
+    params.update(limit=limit + 1, offset=offset)
+    rows = session.execute(text(sql + " LIMIT :limit OFFSET :offset"), params).all()
+    results = [
+        {"type": TYPES_BY_CODE.get(kind, kind), "id": id, "name": name, "rank": round(float(score), 4)}
+        for kind, id, name, score in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit and offset + limit <= MAX_OFFSET:
+        next_cursor = encode_cursor("search", [offset + limit])
+    return results, next_cursor
+
+
+def init_app(db):
+    if not event.contains(db.metadata, "after_create", create_search_index):
+        event.listen(db.metadata, "after_create", create_search_index)
@@ -0,0 +1,364 @@
+"""Carga masiva del catalogo desde ficheros: flask seed <ficheros o directorios>.
+
+El nombre del fichero indica la tabla (users, characters, planets, vehicles, favorites)
+y la extension el formato (.json con un array, .csv con cabecera o .ndjson). Se leen
+fila a fila, sin cargar el fichero entero, y todo va en una sola transaccion:
+
+- Postgres: un COPY ... FROM STDIN por cada bloque de chunk_size filas
+- MySQL: INSERT multi-fila por bloques
+- SQLite y el resto: executemany por bloques
+
+Si una tabla esta vacia sus indices (y los de /search) se borran antes de cargarla y se
+crean al final, una sola pasada en vez de mantenerlos fila a fila. En MySQL no, porque
+el DDL confirma la transaccion.
+
+Los id de los ficheros de entidades se ignoran. Los favoritos se refieren a las filas
+por id (user_id, planet_id, ...) o por nombre (user con el email, planet/character/vehicle
+con el name); los nombres se resuelven con una consulta por tabla. Al final se recalculan
+los favorites_count.
+"""
+import os
+import io
+import re
+import csv
+import json
+import time
+from decimal import Decimal
+from sqlalchemy import select, insert, inspect, text, Boolean, Integer, Numeric
+import search
+from bulk import chunks
+from conditional import bump_version
+from favorites import reconcile_counts
+from models import User, Characters, Planets, Vehicles, Favorites
+
+SEED_CHUNK_SIZE = 5000
+READ_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"\s*")
+NUMBER_CHARS = "0123456789+-.eE"
+
+# nombre del fichero -> (modelo, nombre para las versiones); en el orden en que se cargan
+TABLES = {
+    "users": (User, "user"),
+    "characters": (Characters, "character"),
+    "planets": (Planets, "planet"),
+    "vehicles": (Vehicles, "vehicle"),
+    "favorites": (Favorites, "favorites")
+}
+VERSION_NAMES = {model: name for model, name in TABLES.values()}
+FORMATS = (".json", ".csv", ".ndjson")
+# columnas que no vienen de los ficheros
+SKIPPED_COLUMNS = ("id", "favorites_count")
+
+SEARCHABLE_TABLES = {table for table, code, columns in search.SEARCHABLE.values()}
+
+# referencia de un favorito -> (modelo, columna con el nombre, columna de Favorites)
+REFERENCES = {
+    "user": (User, "email", "user_id"),
+    "planet": (Planets, "name", "planet_id"),
+    "character": (Characters, "name", "character_id"),
+    "vehicle": (Vehicles, "name", "vehicle_id")
+}
+
+
+def table_for(path):
+    """(modelo, nombre) segun el nombre del fichero; acepta tambien el singular (user.csv)."""
+    stem, extension = os.path.splitext(os.path.basename(path))
+    stem = stem.lower()
+    for name in (stem, stem + "s"):
+        if name in TABLES and extension.lower() in FORMATS:
+            return TABLES[name]
+    return None
+
+
+def find_files(paths):
+    """Ficheros a cargar en el orden de TABLES. De un directorio se toman los que tengan
+    un nombre conocido; un fichero indicado a mano tiene que tenerlo."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, name) for name in sorted(os.listdir(path)) if table_for(name)]
+        elif table_for(path):
+            files.append(path)
+        else:
+            raise ValueError(f"{path}: expected one of {', '.join(TABLES)} with extension {', '.join(FORMATS)}")
+    order = list(TABLES.values())
+    return sorted(files, key=lambda file: order.index(table_for(file)))
+
+
+def read_json(f):
+    """Elementos de un array JSON de uno en uno: se decodifica por trozos de READ_SIZE
+    en vez de cargar el fichero entero con json.load."""
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    state, index = "[", 0
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            char = buffer[position]
+            if state == "[":
+                if char != "[":
+                    raise ValueError("expected a JSON array")
+                position, state = position + 1, "first"
+                continue
+            if char == "]" and state in ("first", ","):
+                return
+            if state == ",":
+                if char != ",":
+                    raise ValueError(f"expected , or ] after item {index}")
+                position, state = position + 1, "item"
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # el elemento sigue en el siguiente trozo
+                if eof:
+                    raise
+            else:
+                # un numero solo esta completo si le sigue algo que no puede ser parte de el
+                # ("-0." o "12" al final del trozo pueden seguir en el siguiente)
+                number = isinstance(item, (int, float)) and not isinstance(item, bool)
+                if not number or eof or (end < len(buffer) and buffer[end] not in NUMBER_CHARS):
+                    index += 1
+                    yield index, item
+                    position, state = end, ","
+                    continue
+        elif eof:
+            raise ValueError("unexpected end of JSON array")
+        chunk = f.read(READ_SIZE)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+def read_ndjson(f):
+    for number, line in enumerate(f, 1):
+        if line.strip():
+            yield number, json.loads(line)
+
+
+def read_csv(f):
+    reader = csv.DictReader(f)
+    for item in reader:
+        yield reader.line_num, item
+
+
+READERS = {".json": read_json, ".ndjson": read_ndjson, ".csv": read_csv}
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in ("1", "true", "t", "yes"):
+        return True
+    if value in ("0", "false", "f", "no"):
+        return False
+    raise ValueError(value)
+
+
+def converter(column):
+    # en CSV todo llega como texto: se convierte segun el tipo de la columna
+    if isinstance(column.type, Boolean):
+        return parse_bool
+    if isinstance(column.type, Integer):
+        return int
+    if isinstance(column.type, Numeric):
+        return lambda value: Decimal(str(value))
+    return str
+
+
+def convert(value, convert_value):
+    # "" es la celda vacia de un CSV
+    if value is None or value == "":
+        return None
+    return convert_value(value)
+
+
+class FavoriteResolver:
+    """Convierte las referencias de un favorito en ids; cada tabla de nombres se lee
+    entera una sola vez, la primera vez que un fichero usa nombres para ella."""
+
+    def __init__(self, session):
+        self.session = session
+        self.ids = {}
+
+    def lookup(self, kind, name):
+        if kind not in self.ids:
+            model, column, _ = REFERENCES[kind]
+            self.ids[kind] = dict(self.session.execute(select(getattr(model, column), model.id)).all())
+        if name not in self.ids[kind]:
+            raise ValueError(f"unknown {kind} {name!r}")
+        return self.ids[kind][name]
+
+    def __call__(self, item):
+        row = {}
+        for kind, (model, column, key) in REFERENCES.items():
+            if item.get(key) not in (None, ""):
+                row[key] = int(item[key])
+            elif item.get(kind) not in (None, ""):
+                row[key] = self.lookup(kind, str(item[kind]))
+            else:
+                row[key] = None
+        if row["user_id"] is None:
+            raise ValueError("user or user_id is required")
+        if sum(row[key] is not None for key in ("planet_id", "character_id", "vehicle_id")) != 1:
+            raise ValueError("exactly one of planet, character or vehicle is required")
+        return row
+
+
+def row_converter(session, model):
+    if model is Favorites:
+        return FavoriteResolver(session)
+    columns = [(column.key, converter(column)) for column in model.__table__.columns if column.key not in SKIPPED_COLUMNS]
+
+    def convert_row(item):
+        return {key: convert(item.get(key), convert_value) for key, convert_value in columns}
+    return convert_row
+
+
+def read_rows(session, model, path):
+    """Filas ya convertidas de un fichero; los errores llevan el fichero y la linea
+    (en .json el numero de elemento)."""
+    convert_row = row_converter(session, model)
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        position = None
+        try:
+            for position, item in READERS[extension](f):
+                if not isinstance(item, dict):
+                    raise ValueError("expected an object")
+                yield convert_row(item)
+        except (ValueError, ArithmeticError) as error:
+            # Decimal lanza InvalidOperation (ArithmeticError) con un valor que no es un numero
+            location = path if position is None else f"{path}:{position}"
+            raise ValueError(f"{location}: {error}") from error
+
+
+class CopyStream:
+    """Fichero de solo lectura para cursor.copy_expert: escribe las filas en CSV a medida
+    que COPY las pide, sin armar el bloque entero como texto."""
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def read(self, size=-1):
+        for row in self.rows:
+            # None se escribe como campo vacio sin comillas: NULL para COPY ... (FORMAT csv)
+            self.writer.writerow([row[column] for column in self.columns])
+            if 0 <= size <= self.buffer.tell():
+                break
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def copy_rows(session, table, rows, chunk_size):
+    connection = session.connection()
+    preparer = connection.dialect.identifier_preparer
+    cursor = connection.connection.cursor()
+    try:
+        # las filas de cada bloque se convierten antes de empezar su COPY: resolver los nombres
+        # de los favoritos necesita consultas, y durante un COPY la conexion no acepta otras
+        for chunk in chunks(rows, chunk_size):
+            columns = list(chunk[0])
+            sql = (f"COPY {preparer.format_table(table)} ({', '.join(preparer.quote(column) for column in columns)}) "
+                   f"FROM STDIN WITH (FORMAT csv)")
+            cursor.copy_expert(sql, CopyStream(chunk, columns), size=READ_SIZE)
+    finally:
+        cursor.close()
+
+
+def insert_rows(session, table, rows, chunk_size):
+    multirow = session.get_bind().dialect.name == "mysql"
+    for chunk in chunks(rows, chunk_size):
+        if multirow:
+            session.execute(insert(table).values(chunk))
+        else:
+            session.execute(insert(table), chunk)
+
+
+def count_rows(rows, counter):
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def defer_indexes(session, model):
+    """Si la tabla esta vacia borra sus indices y devuelve los que hay que crear al final
+    (None si no se aplazan). Solo en Postgres y SQLite, donde el DDL entra en la transaccion."""
+    connection = session.connection()
+    if connection.dialect.name not in ("postgresql", "sqlite"):
+        return None
+    if session.scalar(select(model.id).limit(1)) is not None:
+        return None
+    table = model.__table__
+    existing = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+    indexes = [index for index in table.indexes if index.name in existing]
+    for index in indexes:
+        index.drop(connection)
+    if table.name in SEARCHABLE_TABLES:
+        # el indice GIN (Postgres) o el trigger que rellena FTS5 (SQLite): create_search_index
+        # los vuelve a crear y en SQLite indexa de una vez las filas ya cargadas
+        if connection.dialect.name == "postgresql":
+            connection.execute(text(f"DROP INDEX IF EXISTS ix_{table.name}_search"))
+        else:
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {table.name}_search_insert"))
+    return indexes
+
+
+def analyze(session, table):
+    # estadisticas al dia para el planificador (y para el conteo estimado del admin)
+    connection = session.connection()
+    name = connection.dialect.identifier_preparer.format_table(table)
+    if connection.dialect.name == "postgresql":
+        # si las filas traian id (flask snapshot import) la secuencia tiene que seguir despues del maximo
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence(:table, 'id'), coalesce(max(id), 0) + 1, false) FROM {name}"
+        ), {"table": name})
+    if connection.dialect.name in ("postgresql", "sqlite"):
+        connection.execute(text(f"ANALYZE {name}"))
+
+
+def seed_files(session, paths, chunk_size=SEED_CHUNK_SIZE):
+    """Carga los ficheros en orden y va devolviendo (fichero, filas, segundos) de cada uno;
+    ver load_tables."""
+    sources = []
+    for path in find_files(paths):
+        model = table_for(path)[0]
+        sources.append((path, model, read_rows(session, model, path)))
+    return load_tables(session, sources, chunk_size)
+
+
+def load_tables(session, sources, chunk_size=SEED_CHUNK_SIZE):
+    """Carga [(etiqueta, modelo, filas como dicts)] en orden y va devolviendo (etiqueta, filas,
+    segundos). Despues crea los indices aplazados, actualiza contadores, versiones y
+    estadisticas; el commit lo hace quien llama."""
+    connection = session.connection()
+    if connection.dialect.name == "sqlite" and not connection.connection.dbapi_connection.in_transaction:
+        # pysqlite no abre la transaccion hasta el primer INSERT: sin el BEGIN los DROP INDEX
+        # se confirmarian solos y un error dejaria la tabla sin indices
+        connection.exec_driver_sql("BEGIN")
+    load = copy_rows if session.get_bind().dialect.name == "postgresql" else insert_rows
+    loaded, deferred = {}, {}
+    for label, model, rows in sources:
+        if model not in loaded:
+            loaded[model] = VERSION_NAMES[model]
+            deferred[model] = defer_indexes(session, model)
+        counter = [0]
+        start = time.perf_counter()
+        load(session, model.__table__, count_rows(rows, counter), chunk_size)
+        yield label, counter[0], time.perf_counter() - start
+
+    for model, indexes in deferred.items():
+        for index in indexes or ():
+            index.create(connection)
+    if any(indexes is not None and model.__tablename__ in SEARCHABLE_TABLES for model, indexes in deferred.items()):
+        search.create_search_index(None, connection)
+    if Favorites in loaded:
+        reconcile_counts(session)
+    for model, name in loaded.items():
+        bump_version(session, name)
+        analyze(session, model.__table__)
@@ -0,0 +1,127 @@
+"""Serializacion JSON rapida.
+
+OrjsonProvider sustituye al encoder de la libreria estandar en app.json (jsonify,
+request.get_json, streaming) cuando orjson esta instalado; la salida es la misma
+que la de Flask: claves ordenadas, Decimal como string y fechas en formato HTTP.
+
+Para las lecturas, projection() selecciona solo las columnas que devuelve
+serialize() (o las pedidas con ?fields=) y rows_to_dicts() construye los dicts
+directamente desde las tuplas del resultado, sin hidratar objetos del ORM.
+"""
+import os
+import json
+import decimal
+from datetime import date
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+from werkzeug.http import http_date
+from utils import APIException
+from pagination import get_sort
+from filters import sort_keys
+from models import User, Characters, Planets, Vehicles, Favorites
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# mismas claves, en el mismo orden, que serialize() de cada modelo
+SERIALIZED_FIELDS = {
+    User: ("id", "email"),
+    Characters: ("id", "name", "birth_year", "height", "skin_color", "eye_color"),
+    Planets: ("id", "name", "climate", "diameter", "population", "terrain"),
+    Vehicles: ("id", "name", "model", "cargo_capacity", "length", "passengers"),
+    Favorites: ("id", "user_id", "planet_id", "character_id", "vehicle_id")
+}
+
+
+def default(o):
+    # lo que orjson no sabe codificar, igual que DefaultJSONProvider
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSONProvider de Flask sobre orjson. Si se piden opciones que orjson no
+    soporta (cls, separators...) se usa el encoder de la libreria estandar."""
+
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def dumps_bytes(self, obj, indent=False):
+        return orjson.dumps(obj, default=default, option=self.option | (orjson.OPT_INDENT_2 if indent else 0))
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop("indent", None)
+        kwargs.pop("sort_keys", None)
+        kwargs.pop("default", None)
+        if kwargs:
+            return super().dumps(obj, indent=indent, **kwargs)
+        return self.dumps_bytes(obj, indent=bool(indent)).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        # los bytes van directos al cuerpo, sin pasar por str
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype)
+
+
+def init_app(app):
+    """JSON_PROVIDER=stdlib fuerza el encoder por defecto de Flask (p.ej. para comparar)."""
+    if orjson is None or os.getenv("JSON_PROVIDER", "orjson") == "stdlib":
+        return
+    app.json_provider_class = OrjsonProvider
+    app.json = OrjsonProvider(app)
+
+
+def dumps_bytes(obj):
+    """Para codigo fuera de Flask (asgi.py): misma salida que jsonify, sin el salto de linea final."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=OrjsonProvider.option)
+    return json.dumps(obj, default=default, sort_keys=True, ensure_ascii=False).encode()
+
+
+def get_fields(model, args=None):
+    """?fields=id,name -> ("id", "name") en el orden de serialize(); sin el parametro, todos.
+    Solo se aceptan columnas que ya devuelve serialize() (nunca User.password)."""
+    args = request.args if args is None else args
+    allowed = SERIALIZED_FIELDS[model]
+    requested = args.get("fields")
+    if requested is None:
+        return allowed
+    names = {name.strip() for name in requested.split(",") if name.strip()}
+    unknown = sorted(names - set(allowed))
+    if unknown:
+        raise APIException(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}", status_code=400)
+    if not names:
+        raise APIException("fields cannot be empty", status_code=400)
+    return tuple(field for field in allowed if field in names)
+
+
+def projection(model, fields=None):
+    """select() solo de las columnas indicadas (por defecto las de serialize())."""
+    fields = SERIALIZED_FIELDS[model] if fields is None else fields
+    return select(*[getattr(model, field) for field in fields])
+
+
+def page_projection(model, fields, args=None):
+    """Como projection(), pero añade al final id y las columnas de orden si no se han pedido:
+    el cursor de la pagina siguiente los necesita. rows_to_dicts los descarta porque
+    zip se para en el ultimo campo pedido."""
+    sort = [column for column, descending in sort_keys(get_sort(model, args))]
+    extra = tuple(column for column in sort if column not in fields)
+    return projection(model, fields + extra)
+
+
+def rows_to_dicts(rows, fields):
+    return [dict(zip(fields, row)) for row in rows]
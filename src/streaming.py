@@ -0,0 +1,44 @@
+import os
+from flask import Response, current_app, stream_with_context
+from serialization import SERIALIZED_FIELDS, projection
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+
+def iter_rows(session, model, fields=None, conditions=()):
+    # yield_per usa un cursor del lado del servidor (stream_results) y va leyendo
+    # las filas por lotes, asi la memoria no crece con la tabla; solo se leen las
+    # columnas serializadas y no se crean objetos del ORM
+    fields = SERIALIZED_FIELDS[model] if fields is None else fields
+    stmt = projection(model, fields).where(*conditions).order_by(model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for row in session.execute(stmt):
+        yield dict(zip(fields, row))
+
+
+def json_array(rows):
+    dumps = current_app.json.dumps
+    yield '{"results":['
+    first = True
+    for row in rows:
+        if first:
+            first = False
+            yield dumps(row)
+        else:
+            yield "," + dumps(row)
+    yield "]}"
+
+
+def ndjson(rows):
+    dumps = current_app.json.dumps
+    for row in rows:
+        yield dumps(row) + "\n"
+
+
+def stream_export(session, model, fmt="json", fields=None, conditions=()):
+    rows = iter_rows(session, model, fields, conditions)
+    if fmt == "ndjson":
+        body, mimetype = ndjson(rows), "application/x-ndjson"
+    else:
+        body, mimetype = json_array(rows), "application/json"
+    # sin Content-Length el servidor responde con Transfer-Encoding: chunked
+    return Response(stream_with_context(body), mimetype=mimetype)
@@ -0,0 +1,50 @@
+import pytest
+from cache import cache
+from app import create_app
+from models import db, User, Characters, Planets, Vehicles
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Crea apps de prueba, cada una con su propio SQLite en tmp_path y el esquema ya creado."""
+    monkeypatch.setenv("CACHE_BACKEND", "memory")
+    apps = []
+
+    def make(database="test.db"):
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / database}")
+        # la cache de respuestas es global: cada app empieza con una vacia
+        monkeypatch.setattr(cache, "backend", None)
+        app = create_app()
+        app.config.update(TESTING=True, SQL_BUDGET_STRICT=True)
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def catalog(app):
+    """Unos cuantos usuarios y entidades, suficientes para que un N+1 supere cualquier presupuesto."""
+    db.session.add_all([User(email=f"user{i}@example.com", password="x") for i in range(3)])
+    db.session.add_all([Characters(name=f"Character {i}", skin_color="fair") for i in range(30)])
+    db.session.add_all([Planets(name=f"Planet {i}", climate="arid") for i in range(30)])
+    db.session.add_all([Vehicles(name=f"Vehicle {i}", model="T-16") for i in range(30)])
+    db.session.commit()
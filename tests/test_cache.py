@@ -0,0 +1,55 @@
+import pytest
+from cache import CacheBackend, LRUCache, RedisCache, dump_entry, load_entry
+
+ENTRY = (b'{"results": []}\n', 200, {"Content-Type": "application/json", "Link": '</character?cursor=5>; rel="next"'},
+         {"gzip": b"\x1f\x8b\x08\x00gz", "br": b"\x8b\x00br"})
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+@pytest.mark.parametrize("entry", [ENTRY, (b"", 200, {}, {})])
+def test_entry_round_trip(entry):
+    assert load_entry(dump_entry(entry)) == entry
+
+
+def test_lru_evicts_oldest():
+    backend = LRUCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        backend.set(key, ENTRY)
+    assert backend.get("a") is None
+    assert backend.get("c") == ENTRY
+    assert (backend.size(), backend.evictions) == (2, 1)
+
+
+@pytest.fixture
+def redis_cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisCache(fakeredis.FakeRedis(), ttl=60)
+
+
+def test_redis_stores_entries_without_pickle(redis_cache):
+    redis_cache.set("character:list:v1:", ENTRY)
+    assert not redis_cache.client.get("swapi:character:list:v1:").startswith(b"\x80")
+    assert redis_cache.get("character:list:v1:") == ENTRY
+
+
+def test_redis_size_follows_writes(redis_cache):
+    for id in range(3):
+        redis_cache.set(f"character:item:{id}:v1:", ENTRY)
+    redis_cache.set("character:item:0:v1:", ENTRY)
+    assert redis_cache.size() == 3
+    redis_cache.delete("character:item:0:v1:")
+    assert redis_cache.size() == 2
+    redis_cache.delete_prefix("character:")
+    assert redis_cache.size() == 0
+
+
+def test_redis_size_drops_expired_keys(redis_cache):
+    redis_cache.set("planet:list:v1:", ENTRY)
+    redis_cache.set("planet:list:v2:", ENTRY)
+    # como si la primera hubiera caducado en Redis
+    redis_cache.client.zadd(redis_cache.index_key, {"swapi:planet:list:v1:": 0})
+    assert redis_cache.size() == 1
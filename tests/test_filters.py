@@ -0,0 +1,40 @@
+from urllib.parse import quote
+import pytest
+from filters import prefix_upper_bound
+from models import db, Characters
+
+NAMES = ["Luke", "Lumiya", "Lux", "Mon Mothma", "Z\U0010ffff", "Z\U0010ffff\U0010ffffx", "\ud7ff droid", "\ue000 droid"]
+
+
+@pytest.mark.parametrize("prefix, upper", [
+    ("Lu", "Lv"),
+    ("Z\U0010ffff", "["),
+    ("\U0010ffff\U0010ffff", None),
+    ("\ud7ff", "\ue000"),
+])
+def test_prefix_upper_bound(prefix, upper):
+    assert prefix_upper_bound(prefix) == upper
+
+
+@pytest.fixture
+def characters(app):
+    db.session.add_all([Characters(name=name) for name in NAMES])
+    db.session.commit()
+
+
+@pytest.mark.parametrize("prefix, expected", [
+    ("Lu", ["Luke", "Lumiya", "Lux"]),
+    ("Z\U0010ffff", ["Z\U0010ffff", "Z\U0010ffff\U0010ffffx"]),
+    ("Z\U0010ffff\U0010ffff", ["Z\U0010ffff\U0010ffffx"]),
+    ("\ud7ff", ["\ud7ff droid"]),
+])
+def test_prefix_filter(client, characters, prefix, expected):
+    response = client.get(f"/character?name__prefix={quote(prefix, safe='')}")
+    assert response.status_code == 200
+    assert [row["name"] for row in response.json["results"]] == expected
+
+
+def test_prefix_of_max_code_point_only(client, characters):
+    response = client.get("/character?name__prefix=%F4%8F%BF%BF")
+    assert response.status_code == 404
+    assert response.json == {"error": "No characters found"}
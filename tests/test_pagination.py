@@ -0,0 +1,45 @@
+import pytest
+from pagination import encode_cursor
+from models import db, Characters
+
+
+@pytest.fixture
+def characters(app):
+    db.session.add_all([Characters(name=f"Character {i:02}", eye_color=None if i % 3 else "blue") for i in range(12)])
+    db.session.commit()
+
+
+def test_pages_follow_the_cursor(client, characters):
+    names, url = [], "/character?limit=5&sort=eye_color"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        names += [row["name"] for row in response.json["results"]]
+        cursor = response.json["next_cursor"]
+        url = f"/character?limit=5&sort=eye_color&cursor={cursor}" if cursor else None
+    assert sorted(names) == [f"Character {i:02}" for i in range(12)]
+    assert len(names) == 12
+
+
+@pytest.mark.parametrize("sort, values", [
+    ("id", ["5"]),
+    ("id", [True]),
+    ("id", [1.5]),
+    ("id", [None]),
+    ("id", [2 ** 40]),
+    ("id", [[1]]),
+    ("name", [7, 1]),
+    ("name", [None, 1]),
+    ("name", ["Luke\x00", 1]),
+    ("eye_color", [{"a": 1}, 1]),
+    ("eye_color", ["blue"]),
+])
+def test_tampered_cursor_is_rejected(client, characters, sort, values):
+    response = client.get(f"/character?sort={sort}&cursor={encode_cursor(sort, values)}")
+    assert response.status_code == 400
+    assert response.json["message"] == "Invalid cursor"
+
+
+def test_null_cursor_value_on_nullable_column(client, characters):
+    response = client.get(f"/character?sort=eye_color&cursor={encode_cursor('eye_color', [None, 1])}")
+    assert response.status_code == 200
@@ -0,0 +1,98 @@
+import math
+import pytest
+import app as api_module
+from bulk import BULK_CHUNK_SIZE
+from instrumentation import count_queries, QueryBudgetExceeded
+
+ENTITIES = ("user", "character", "planet", "vehicle")
+
+
+def queries(client, method, url, **kwargs):
+    with count_queries() as stats:
+        response = getattr(client, method)(url, **kwargs)
+    return response, stats.count
+
+
+@pytest.mark.parametrize("entity", ENTITIES)
+def test_list_within_budget(client, catalog, entity):
+    response, count = queries(client, "get", f"/{entity}?limit=25")
+    assert response.status_code == 200
+    assert len(response.json["results"]) == (3 if entity == "user" else 25)
+    assert count <= api_module.READ_BUDGET
+
+
+@pytest.mark.parametrize("entity", ENTITIES)
+def test_detail_within_budget(client, catalog, entity):
+    response, count = queries(client, "get", f"/{entity}/2")
+    assert response.status_code == 200
+    assert count <= api_module.READ_BUDGET
+
+
+@pytest.mark.parametrize("entity", ("character", "planet", "vehicle"))
+def test_cached_list_only_checks_version(client, catalog, entity):
+    client.get(f"/{entity}?limit=25")
+    response, count = queries(client, "get", f"/{entity}?limit=25")
+    assert response.headers["X-Cache"] == "HIT"
+    assert count == 1
+
+
+def test_favorites_batch_within_budget(client, catalog):
+    batch = {"character_ids": list(range(1, 21)), "planet_ids": list(range(1, 21)), "vehicle_ids": [1, 2, 3]}
+    response, count = queries(client, "post", "/user/1/favorites/batch", json=batch)
+    assert response.status_code == 200
+    assert response.json["added"]["character_ids"] == list(range(1, 21))
+    assert count <= api_module.FAVORITES_BATCH_BUDGET
+
+    # repetir el mismo lote no inserta nada
+    response, count = queries(client, "post", "/user/1/favorites/batch", json=batch)
+    assert response.json["already_favorite"]["planet_ids"] == list(range(1, 21))
+    assert count <= api_module.FAVORITES_BATCH_BUDGET
+
+
+@pytest.mark.parametrize("expand", ("0", "1"))
+def test_user_favorites_within_budget(client, catalog, expand):
+    client.post("/user/1/favorites/batch", json={"character_ids": list(range(1, 21)), "planet_ids": [1, 2]})
+    response, count = queries(client, "get", f"/user/1/favorite?expand={expand}")
+    assert response.status_code == 200
+    assert count <= api_module.READ_BUDGET
+
+
+@pytest.mark.parametrize("kind", ("character", "planet"))
+def test_add_favorite_within_budget(client, catalog, kind):
+    response, count = queries(client, "post", f"/favorite/{kind}", json={"user_id": 1, f"{kind}_id": 3})
+    assert response.status_code == 200
+    assert count <= api_module.FAVORITE_BUDGET
+
+
+def test_bulk_create_queries_per_chunk(client, app):
+    items = [
+        {"name": f"Bulk {i}", "birth_year": "19BBY", "height": 1.72, "skin_color": "fair", "eye_color": "blue"}
+        for i in range(BULK_CHUNK_SIZE * 2 + BULK_CHUNK_SIZE // 2)
+    ]
+    response, count = queries(client, "post", "/character/bulk", json=items)
+    assert response.status_code == 200
+    assert response.json["created"] == len(items)
+    # por bloque: nombres existentes, savepoint, insert y release; mas la version de la tabla
+    chunks = math.ceil(len(items) / BULK_CHUNK_SIZE)
+    assert count <= 4 * chunks + 2
+
+
+def test_strict_budget_raises(client, catalog, app):
+    app.config["SQL_QUERY_BUDGET"] = 0
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/top/character")
+
+
+def test_replica_health_check_not_counted(tmp_path, make_app, monkeypatch):
+    # la "replica" es el mismo SQLite que el primario; con intervalo 0 se comprueba en cada request
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("REPLICA_HEALTH_INTERVAL", "0")
+    app = make_app()
+    with app.app_context():
+        replica = app.extensions["replica_router"].replicas[0]
+        client = app.test_client()
+        checked = replica.checked_at
+        response, count = queries(client, "get", "/character")
+        assert response.status_code == 404
+        assert replica.checked_at > checked
+        assert count <= api_module.READ_BUDGET
@@ -0,0 +1,104 @@
+import io
+import json
+from decimal import Decimal
+import pytest
+from sqlalchemy import select
+import seed
+from seed import read_json, seed_files
+from models import db, User, Characters, Planets, Favorites
+
+DOCUMENT = """[
+  {"name": "Luke \\"Red Five\\" Skywalker", "path": "C:\\\\Users\\\\luke", "n": 1234567890},
+  {"name": "Ñandú \\u00f1 \\ud83d\\ude80", "tags": ["a,b", "]", "[", "{}"], "height": 1.72e0},
+  12345, -0.5, 6.02e+23, -1E-7, 0, true, null, "x\\\\", [], {},
+  {"nested": {"list": [1, [2, [3]]], "empty": ""}}
+]"""
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 5, 7, 64 * 1024])
+def test_read_json_across_chunk_boundaries(monkeypatch, read_size):
+    monkeypatch.setattr(seed, "READ_SIZE", read_size)
+    items = [item for index, item in read_json(io.StringIO(DOCUMENT))]
+    assert items == json.loads(DOCUMENT)
+
+
+@pytest.mark.parametrize("document", [
+    "",
+    "   ",
+    '{"name": "Luke"}',
+    "[1 2]",
+    "[1,,2]",
+    "[1,]",
+    '[{"name": "Luke"}',
+    '[{"name": "Lu',
+    '[{"name": "Luke\\"}]',
+    "[tru]",
+])
+@pytest.mark.parametrize("read_size", [1, 4, 64 * 1024])
+def test_read_json_rejects_malformed_input(monkeypatch, document, read_size):
+    monkeypatch.setattr(seed, "READ_SIZE", read_size)
+    with pytest.raises(ValueError):
+        list(read_json(io.StringIO(document)))
+
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / "users.csv").write_text("email,password,is_active\nleia@example.com,x,yes\nhan@example.com,,0\n")
+    (tmp_path / "characters.ndjson").write_text(
+        '{"name": "Luke", "height": "1.72", "eye_color": "blue"}\n\n{"name": "C-3PO", "height": 1.67, "skin_color": "gold"}\n'
+    )
+    (tmp_path / "planets.json").write_text('[{"name": "Tatooine", "diameter": 10465}, {"name": "Hoth", "climate": "frozen"}]')
+    return tmp_path
+
+
+def write_favorites(directory, favorites):
+    (directory / "favorites.json").write_text(json.dumps(favorites))
+
+
+def test_seed_converts_csv_and_ndjson(app, files):
+    list(seed_files(db.session, [str(files)]))
+    db.session.commit()
+    users = db.session.execute(select(User.email, User.password, User.is_active).order_by(User.id)).all()
+    assert users == [("leia@example.com", "x", True), ("han@example.com", None, False)]
+    luke, threepio = db.session.scalars(select(Characters).order_by(Characters.id)).all()
+    assert (luke.height, luke.skin_color, threepio.height) == (Decimal("1.72"), None, Decimal("1.67"))
+    assert db.session.scalar(select(Planets.diameter).where(Planets.name == "Tatooine")) == 10465
+
+
+def test_seed_resolves_favorites_by_name_or_id(app, files):
+    write_favorites(files, [
+        {"user": "leia@example.com", "planet": "Hoth"},
+        {"user": "han@example.com", "character": "C-3PO"},
+        {"user_id": 1, "character_id": 1},
+        {"user": "han@example.com", "planet_id": 1},
+    ])
+    list(seed_files(db.session, [str(files)]))
+    db.session.commit()
+    favorites = db.session.execute(
+        select(Favorites.user_id, Favorites.planet_id, Favorites.character_id).order_by(Favorites.id)
+    ).all()
+    assert favorites == [(1, 2, None), (2, None, 2), (1, None, 1), (2, 1, None)]
+    assert db.session.get(Planets, 2).favorites_count == 1
+
+
+@pytest.mark.parametrize("favorite, error", [
+    ({"user": "leia@example.com", "planet": "Alderaan"}, "favorites.json:2: unknown planet 'Alderaan'"),
+    ({"user": "luke@example.com", "planet": "Hoth"}, "favorites.json:2: unknown user 'luke@example.com'"),
+    ({"planet": "Hoth"}, "favorites.json:2: user or user_id is required"),
+    ({"user": "leia@example.com", "planet": "Hoth", "character": "Luke"}, "exactly one of planet, character or vehicle"),
+])
+def test_seed_rejects_unknown_favorites(app, files, favorite, error):
+    write_favorites(files, [{"user": "leia@example.com", "planet": "Tatooine"}, favorite])
+    with pytest.raises(ValueError, match=error):
+        list(seed_files(db.session, [str(files)]))
+
+
+def test_seed_cli_reports_clean_error(make_app, files):
+    (files / "planets.json").write_text('[{"name": "Tatooine"}, {"name": "Ho')
+    target = make_app()
+    result = target.test_cli_runner().invoke(args=["seed", str(files)])
+    assert result.exit_code == 1
+    assert "planets.json:1: Unterminated string" in result.output
+    with target.app_context():
+        # todo va en una transaccion: tampoco quedan los usuarios ni los personajes
+        assert db.session.scalar(select(User.id)) is None
@@ -0,0 +1,116 @@
+from decimal import Decimal
+import pytest
+from sqlalchemy import select, func
+import snapshot
+from models import db, User, Characters, Planets, Favorites
+
+
+def write_snapshot(directory, model):
+    path = snapshot.snapshot_path(directory, model, "columnar")
+    with open(path, "wb") as f:
+        for rows in snapshot.write_table(db.session, model, f, "columnar"):
+            pass
+    return path
+
+
+def read_snapshot(path):
+    with snapshot.open_snapshot(path) as reader:
+        return reader.table, list(snapshot.snapshot_rows(reader))
+
+
+@pytest.fixture
+def characters(app):
+    db.session.add_all([
+        Characters(name="Luke Skywalker", birth_year="19BBY", height=Decimal("1.72"), skin_color="fair", eye_color="blue"),
+        Characters(name="Ñandú \"el\" \\ 🚀", birth_year=None, height=None, skin_color="", eye_color=None),
+        Characters(name="C-3PO", birth_year="112BBY", height=Decimal("-0.05"), skin_color="gold", eye_color="yellow"),
+    ])
+    db.session.commit()
+
+
+def test_columnar_round_trip(tmp_path, characters):
+    path = write_snapshot(tmp_path, Characters)
+    table, rows = read_snapshot(path)
+    expected = [row._asdict() for row in db.session.execute(select(*Characters.__table__.columns).order_by(Characters.id))]
+    assert table == "characters"
+    assert rows == expected
+    assert rows[1]["birth_year"] is None and rows[1]["height"] is None and rows[1]["skin_color"] == ""
+
+
+def test_columnar_empty_table(tmp_path, app):
+    table, rows = read_snapshot(write_snapshot(tmp_path, Planets))
+    assert (table, rows) == ("planets", [])
+
+
+def test_columnar_round_trip_across_batches(tmp_path, app, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_BATCH_SIZE", 2)
+    db.session.add_all([Planets(name=f"Planet {i}", diameter=None if i % 2 else i) for i in range(5)])
+    db.session.commit()
+    path = write_snapshot(tmp_path, Planets)
+    with snapshot.open_snapshot(path) as reader:
+        assert len(reader.footer_batches) == 3
+    assert [row["diameter"] for row in read_snapshot(path)[1]] == [0, None, 2, None, 4]
+
+
+@pytest.mark.parametrize("keep", [0, 5, -1, -20])
+def test_truncated_columnar_file(tmp_path, characters, keep):
+    path = write_snapshot(tmp_path, Characters)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:keep])
+    with pytest.raises(ValueError, match="not a complete columnar snapshot"):
+        snapshot.open_snapshot(path)
+
+
+def test_user_snapshot_has_no_password(tmp_path, app):
+    db.session.add(User(email="leia@example.com", password="secret", is_active=True))
+    db.session.commit()
+    table, rows = read_snapshot(write_snapshot(tmp_path, User))
+    assert rows == [{"id": 1, "email": "leia@example.com", "is_active": True}]
+
+
+@pytest.fixture
+def source(make_app):
+    # los comandos de flask usan el app context que ya este activo: aqui no hay ninguno, cada
+    # app de los tests de la CLI trabaja con su propia base de datos
+    app = make_app("source.db")
+    with app.app_context():
+        db.session.add_all([User(email=f"user{i}@example.com", password="x") for i in range(3)])
+        db.session.add_all([Characters(name=f"Character {i}") for i in range(5)])
+        db.session.add_all([Planets(name=f"Planet {i}") for i in range(5)])
+        db.session.flush()
+        db.session.add_all([Favorites(user_id=1, character_id=3), Favorites(user_id=1, planet_id=2), Favorites(user_id=2, planet_id=2)])
+        db.session.commit()
+    return app
+
+
+def test_cli_export_import_into_empty_database(tmp_path, make_app, source):
+    directory = str(tmp_path / "snap")
+    result = source.test_cli_runner().invoke(args=["snapshot", "export", directory, "--format", "columnar"])
+    assert result.exit_code == 0, result.output
+
+    target = make_app("target.db")
+    result = target.test_cli_runner().invoke(args=["snapshot", "import", directory])
+    assert result.exit_code == 0, result.output
+    with target.app_context():
+        favorites = db.session.execute(
+            select(Favorites.user_id, Favorites.character_id, Favorites.planet_id, Favorites.vehicle_id).order_by(Favorites.id)
+        ).all()
+        assert favorites == [(1, 3, None, None), (1, None, 2, None), (2, None, 2, None)]
+        assert db.session.scalar(select(func.count()).select_from(Characters)) == 5
+        assert db.session.get(User, 2).email == "user1@example.com"
+        assert db.session.get(User, 2).password is None
+        assert db.session.get(Planets, 2).favorites_count == 2
+
+
+def test_cli_import_rejects_truncated_file(tmp_path, make_app, source):
+    directory = tmp_path / "snap"
+    source.test_cli_runner().invoke(args=["snapshot", "export", str(directory), "--format", "columnar", "--table", "planet"])
+    path = directory / "planets.col"
+    path.write_bytes(path.read_bytes()[:-3])
+
+    target = make_app("target.db")
+    result = target.test_cli_runner().invoke(args=["snapshot", "import", str(directory)])
+    assert result.exit_code == 1
+    assert "not a complete columnar snapshot" in result.output